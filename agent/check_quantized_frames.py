@@ -0,0 +1,90 @@
+'''
+check that quantized uint8 frames from the Rust environment stay within half a
+coverage level of the float frames and that model outputs from quantized
+frames stay within the error bound implied by that input error for several
+frame layouts
+'''
+
+from models.batch_model import Model
+import numpy as np
+import pong_rl
+
+# check parameters
+
+num_games = 10 # per layout
+repeat = 2
+seed = 0
+tolerance = 0.5 / 255 + 1e-12 # half a quantization level
+layouts = [(8, None), (4, None), (8, (400, 0, 800, 480))] # rescale and crop
+
+# create seeded environment
+
+np.random.seed(seed)
+pong = pong_rl.PongEnv.without_render(seed)
+
+max_difference = 0
+max_hidden_difference = 0
+max_output_difference = 0
+max_output_bound = 0
+num_frames = 0
+
+for rescale, crop in layouts:
+    # switch frame layout and create model with random weights for its size
+
+    pong.set_frame_layout(rescale, crop)
+    model = Model.with_random_weights(pong.frame_len, 50, 1, 0.001)
+    quantized_frame = np.empty(pong.frame_len, dtype=np.uint8)
+    abs_hidden_weights = np.abs(model.weights[0][:, :-1])
+    abs_output_weights = np.abs(model.weights[1][:, :-1])
+
+    for g in range(num_games):
+        pong.start()
+        reward = 0
+
+        while reward == 0:
+            # compare quantized and float frames
+
+            frame = pong.get_normalized_frame()
+            pong.write_normalized_frame(quantized_frame)
+            if frame.size != pong.frame_len:
+                raise AssertionError("frame length {} differs from layout length {}".format(frame.size, pong.frame_len))
+            if not np.array_equal(quantized_frame, pong.get_quantized_frame()):
+                raise AssertionError("written and returned quantized frames differ at frame {}".format(num_frames))
+
+            input_error = np.abs(quantized_frame / 255 - frame)
+            difference = np.max(input_error)
+            if difference > tolerance:
+                raise AssertionError("quantization error {} exceeds {} at frame {}".format(difference, tolerance, num_frames))
+            max_difference = max(max_difference, difference)
+
+            # bound hidden outputs by input error, at most half a level per
+            # cell, times absolute input weights, which relu does not increase,
+            # and outputs by hidden bounds times absolute output weights times
+            # the largest sigmoid slope of 1/4
+
+            hidden_bound = np.dot(abs_hidden_weights, input_error) + 1e-12
+            output_bound = np.dot(abs_output_weights, hidden_bound) * 0.25 + 1e-12
+            max_output_bound = max(max_output_bound, np.max(output_bound))
+
+            # compare model outputs from quantized frame against float frame
+
+            h, output = model.forward(frame)
+            quantized_h, quantized_output = model.quantized_forward(quantized_frame)
+            hidden_difference = np.abs(quantized_h - h)
+            if np.any(hidden_difference > hidden_bound):
+                raise AssertionError("hidden output difference {} exceeds bound at frame {}".format(np.max(hidden_difference), num_frames))
+            output_difference = np.abs(quantized_output - output)
+            if np.any(output_difference > output_bound):
+                raise AssertionError("output difference {} exceeds {} at frame {}".format(np.max(output_difference), np.max(output_bound), num_frames))
+            max_hidden_difference = max(max_hidden_difference, np.max(hidden_difference))
+            max_output_difference = max(max_output_difference, np.max(output_difference))
+            num_frames += 1
+
+            reward, game_state = pong.step(np.random.randint(0, 2), repeat)
+
+        pong.reset()
+
+print("checked {} frames over {} games in each of {} layouts".format(num_frames, num_games, len(layouts)))
+print("max quantization error: {} (bound {})".format(max_difference, tolerance))
+print("max hidden output difference: {}".format(max_hidden_difference))
+print("max output difference: {} (bound {})".format(max_output_difference, max_output_bound))
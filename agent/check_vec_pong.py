@@ -0,0 +1,73 @@
+'''
+check that the NumPy Pong implementation follows the same multi-step
+trajectories as the Rust environment for the same serves and actions, with
+games only resynced when a new serve starts
+'''
+
+from models.vec_pong import VecPong
+import numpy as np
+import pong_rl
+
+# check parameters
+
+num_games = 256
+num_steps = 5000
+repeat = 2
+seed = 0
+drift_tolerance = 1e-6 # state difference allowed to accumulate over a game from resync rounding
+
+# create seeded environments starting from the same states
+
+np.random.seed(seed)
+rust_pong = pong_rl.PongVecEnv.without_render(num_games, seed)
+rust_pong.start()
+vec_pong = VecPong(num_games, seed)
+vec_pong.set_normalized_states(rust_pong.get_normalized_states())
+
+max_difference = 0
+finished_games = 0
+game_steps = np.zeros(num_games, dtype=np.int64) # steps since each game was last synced
+max_game_steps = 0
+
+for s in range(num_steps):
+    # advance both environments with the same random actions
+
+    actions = np.random.randint(0, 2, num_games)
+    rust_states, rust_rewards, rust_dones = rust_pong.step(actions, repeat)
+    vec_states, vec_rewards, vec_dones = vec_pong.step(actions, repeat)
+
+    game_steps += 1
+    if not np.array_equal(rust_rewards, vec_rewards) or not np.array_equal(rust_dones, vec_dones):
+        games = np.flatnonzero((rust_rewards != vec_rewards) | (rust_dones != vec_dones))
+        raise AssertionError("rewards differ at step {} in games {} after {} steps since sync".format(
+            s,
+            games,
+            game_steps[games],
+        ))
+
+    # compare states of continuing games against the drift tolerance
+
+    differences = np.max(np.abs(rust_states - vec_states), axis=1)
+    differences[rust_dones] = 0
+    difference = np.max(differences)
+    if difference > drift_tolerance:
+        game = np.argmax(differences)
+        raise AssertionError("states differ by {} at step {} in game {} after {} steps since sync".format(
+            difference,
+            s,
+            game,
+            game_steps[game],
+        ))
+    max_difference = max(max_difference, difference)
+
+    # resync only finished games to copy serves of reset games, which are drawn
+    # from different random generators
+
+    max_game_steps = max(max_game_steps, np.max(game_steps[rust_dones], initial=0))
+    finished_games += np.count_nonzero(rust_dones)
+    vec_pong.set_normalized_states(rust_states, rust_dones)
+    game_steps[rust_dones] = 0
+
+print("finished games:", finished_games)
+print("longest synced trajectory:", max(max_game_steps, np.max(game_steps)), "steps")
+print("max state difference:", max_difference)
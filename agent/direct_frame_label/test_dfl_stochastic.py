@@ -7,12 +7,14 @@ import sys
 sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute()))
 
 from models.stochastic_model import Model
+from models.frame_layout import apply_frame_layout
 import numpy as np
 import pong_rl
 
 checkpoint = 8
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 save_folder = "stochastic_models"
-model = Model.from_save("agent/direct_frame_label/" + save_folder + "/" + str(checkpoint) + ".json")
+model = Model.from_save("agent/direct_frame_label/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
 print("loaded model with parameters ({}, {}, {}, {}) from checkpoint {}".format(
     model.input_size,
     model.hidden_size,
@@ -22,6 +24,7 @@ print("loaded model with parameters ({}, {}, {}, {}) from checkpoint {}".format(
 ))
 
 pong = pong_rl.PongEnv.with_render()
+apply_frame_layout(pong, model)
 pong.start()
 
 while True:
@@ -32,8 +35,6 @@ while True:
         h, action_prob = model.forward(current_frame)
         action = 1 if np.random.uniform() < action_prob[0] else 0
 
-        reward = pong.tick(action)
-        if reward == 0:
-            reward = pong.tick(action)
+        reward, _ = pong.step(action, 2)
     
     pong.reset()
\ No newline at end of file
@@ -6,6 +6,8 @@ from models.stochastic_model import Model as StochasticModel
 from models.batch_model import Model as BatchModel
 from models.dqn_model import Model as DQNModel
 from models.policy_model import Model as PolicyModel
+from models.frame_stack import FrameStack
+from models.frame_layout import apply_frame_layout
 import numpy as np
 import pong_rl
 
@@ -15,38 +17,58 @@ Model = PolicyModel
 model_type = "state_policy"
 folder_path = "agent/state_reinforce/reinforce_models"
 checkpoint = 50
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 num_trials = 20
 trial_len = 500
+num_envs = 100 # games run in lockstep with batched inference, state models only
+seed = 0 # seeds game serves and action sampling
 
-# create game environment
+# number of stacked frames input to frame models
 
-pong = pong_rl.PongEnv.without_render()
+frame_inputs = {
+    "direct_frame_label": 1,
+    "frame_label": 2,
+}
+
+# create seeded game environment
+
+np.random.seed(seed)
+pong = None
+if num_envs > 1:
+    pong = pong_rl.PongVecEnv.without_render(num_envs, seed)
+else:
+    pong = pong_rl.PongEnv.without_render(seed)
 pong.start()
 
 # load model from file
 
-model = Model.from_save(folder_path + "/" + str(checkpoint) + ".json")
+model = Model.from_save(folder_path + "/" + str(checkpoint) + checkpoint_ext, mmap_mode="r")
 print("loaded model with parameters ({}, {}, {})".format(
     model.input_size,
     model.hidden_size,
     model.output_size,
 ))
-records = []
 
-for t in range(num_trials):
-    # run trial and record wins and losses
+# export frames with the layout the model was trained with
 
+if num_envs == 1 and model_type in frame_inputs:
+    apply_frame_layout(pong, model, frame_inputs[model_type])
+frames = FrameStack(2, pong.frame_len) if num_envs == 1 else None
+
+# run trial of games one at a time and return record of wins and losses
+
+def run_trial():
     record = [0, 0]
     
     for e in range(trial_len):
-        prev_frame = pong.get_normalized_frame()
+        frames.reset(pong.write_normalized_frame)
         reward = 0
+        game_state = pong.get_normalized_state()
 
         while reward == 0:
             # process game state
             
-            game_state = pong.get_normalized_state()
-            current_frame = pong.get_normalized_frame()
+            frames.push(pong.write_normalized_frame)
 
             # select action
 
@@ -55,11 +77,10 @@ for t in range(num_trials):
                 h, action_prob = model.forward(game_state)
                 action = 1 if np.random.uniform() < action_prob[0] else 0
             elif model_type == "direct_frame_label":
-                h, action_prob = model.forward(current_frame)
+                h, action_prob = model.forward(frames.latest())
                 action = 1 if np.random.uniform() < action_prob[0] else 0
             elif model_type == "frame_label":
-                stacked_frame = np.concatenate((prev_frame, current_frame))
-                h, action_prob = model.forward(stacked_frame)
+                h, action_prob = model.forward_stacked(frames.frames())
                 action = 1 if np.random.uniform() < action_prob[0] else 0
             elif model_type == "state_dqn":
                 h, action_values = model.forward(game_state)
@@ -70,10 +91,7 @@ for t in range(num_trials):
 
             # advance game with action
             
-            reward = pong.tick(action)
-            if reward == 0:
-                reward = pong.tick(action)
-            prev_frame = current_frame
+            reward, game_state = pong.step(action, 2)
         
         # record final result
         
@@ -83,6 +101,54 @@ for t in range(num_trials):
         else:
             record[1] += 1
     
+    return record
+
+# run trial of games split across lockstep environments and return record of
+# wins and losses, where each environment plays a fixed number of games so
+# longer games are not dropped
+
+def run_lockstep_trial():
+    record = [0, 0]
+    env_games = np.full(num_envs, trial_len // num_envs)
+    env_games[:trial_len % num_envs] += 1
+    game_states = pong.get_normalized_states()
+
+    while np.any(env_games > 0):
+        # select actions for all games
+
+        actions = None
+        if model_type == "state_label":
+            h, action_probs = model.batch_forward(game_states)
+            actions = (np.random.uniform(size=num_envs) < action_probs[0]).astype(np.int64)
+        elif model_type == "state_dqn":
+            h, action_values = model.batch_forward(game_states)
+            actions = (action_values[0] < action_values[1]).astype(np.int64)
+        elif model_type == "state_policy":
+            h, action_probs = model.batch_forward(game_states)
+            cumulative_probs = np.cumsum(action_probs, axis=0)
+            actions = np.sum(cumulative_probs < np.random.uniform(size=num_envs), axis=0)
+            np.minimum(actions, len(action_probs) - 1, out=actions) # guard against rounding
+        else:
+            raise ValueError("lockstep evaluation requires a state model type")
+
+        # advance games and record results of counted games
+
+        game_states, rewards, dones = pong.step(actions, 2)
+        counted = dones & (env_games > 0)
+        record[0] += int(np.count_nonzero(counted & (rewards == 1)))
+        record[1] += int(np.count_nonzero(counted & (rewards != 1)))
+        env_games -= counted
+    
+    pong.reset()
+    pong.start()
+    return record
+
+records = []
+
+for t in range(num_trials):
+    # run trial and record wins and losses
+
+    record = run_lockstep_trial() if num_envs > 1 else run_trial()
     records.append(record)
     print("finished trial:", t + 1)
 
@@ -6,6 +6,7 @@ from models.stochastic_model import Model as StochasticModel
 from models.batch_model import Model as BatchModel
 from models.dqn_model import Model as DQNModel
 from models.policy_model import Model as PolicyModel
+from models.frame_layout import apply_frame_layout
 import numpy as np
 import pong_rl
 
@@ -15,8 +16,20 @@ Model = PolicyModel
 model_type = "state_policy"
 folder_path = "agent/state_reinforce/reinforce_models"
 checkpoint_range = [1, 50]
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 num_trials = 3
 trial_len = 100
+seed = 0 # every checkpoint plays the same seeded serves
+native_max_ticks = 100000 # games longer than this continue in Python
+
+# output activations of state models which can play whole games inside the
+# environment
+
+native_activations = {
+    "state_label": "sigmoid",
+    "state_dqn": "linear",
+    "state_policy": "softmax",
+}
 print("save folder:", folder_path)
 
 # create game environment
@@ -27,19 +40,36 @@ pong.start()
 for checkpoint in range(checkpoint_range[0], checkpoint_range[1] + 1):
     # load model from file
 
-    model = Model.from_save(folder_path + "/" + str(checkpoint) + ".json")
+    model = Model.from_save(folder_path + "/" + str(checkpoint) + checkpoint_ext, mmap_mode="r")
+    if model_type == "direct_frame_label":
+        apply_frame_layout(pong, model)
     records = []
 
+    # reseed game environment and action sampling
+
+    np.random.seed(seed)
+    pong.reseed(seed)
+    pong.reset()
+
     for t in range(num_trials):
         # run trial and record wins and losses
 
         record = [0, 0]
         for e in range(trial_len):
             reward = 0
+            if model_type in native_activations:
+                states, actions, reward = pong.run_episode(
+                    model.weights[0],
+                    model.weights[1],
+                    native_activations[model_type],
+                    native_max_ticks,
+                    2,
+                )
+
+            game_state = pong.get_normalized_state()
             while reward == 0:
                 # process game state
                 
-                game_state = pong.get_normalized_state()
                 current_frame = pong.get_normalized_frame()
 
                 # select action
@@ -60,9 +90,7 @@ for checkpoint in range(checkpoint_range[0], checkpoint_range[1] + 1):
 
                 # advance game with action
                 
-                reward = pong.tick(action)
-                if reward == 0:
-                    reward = pong.tick(action)
+                reward, game_state = pong.step(action, 2)
             
             # record final result
             
@@ -0,0 +1,144 @@
+'''
+evaluate model performance over a range of checkpoints in parallel Pong
+environments using a process or thread pool
+'''
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from models.stochastic_model import Model as StochasticModel
+from models.batch_model import Model as BatchModel
+from models.dqn_model import Model as DQNModel
+from models.policy_model import Model as PolicyModel
+from models.frame_stack import FrameStack
+from models.frame_layout import apply_frame_layout
+import numpy as np
+import pong_rl
+import threading
+
+# test parameters
+
+Model = PolicyModel
+model_type = "state_policy"
+folder_path = "agent/state_reinforce/reinforce_models"
+checkpoint_range = [1, 50]
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+num_trials = 3
+trial_len = 100
+num_workers = None # defaults to number of processors
+Executor = ProcessPoolExecutor # or ThreadPoolExecutor, which steps games without the GIL
+seed = 0 # every checkpoint plays the same seeded serves in each trial, or None for unseeded trials
+
+# number of stacked frames input to frame models
+
+frame_inputs = {
+    "direct_frame_label": 1,
+    "frame_label": 2,
+}
+
+# game environment, frame stack, and loaded models owned by each worker
+
+worker = threading.local()
+
+# create game environment and frame stack for worker
+
+def init_worker():
+    worker.pong = pong_rl.PongEnv.without_render()
+    worker.pong.start()
+    worker.frames = FrameStack(2, worker.pong.frame_len)
+    worker.models = {}
+
+# run trial of a checkpoint and return checkpoint, trial, and record of wins
+# and losses
+
+def run_trial(checkpoint, trial):
+    # reseed game environment and action sampling for trial, or draw fresh
+    # entropy for both when unseeded
+
+    rng = np.random.default_rng(None if seed is None else [seed, trial])
+    pong = worker.pong
+    pong.reseed(int(rng.integers(2 ** 32)))
+    pong.reset()
+
+    # load model from file once per worker
+
+    if checkpoint not in worker.models:
+        worker.models[checkpoint] = Model.from_save(folder_path + "/" + str(checkpoint) + checkpoint_ext, mmap_mode="r")
+    model = worker.models[checkpoint]
+
+    # export frames with the layout the model was trained with
+
+    if model_type in frame_inputs:
+        apply_frame_layout(pong, model, frame_inputs[model_type])
+        if worker.frames.frame_len != pong.frame_len:
+            worker.frames = FrameStack(2, pong.frame_len)
+    frames = worker.frames
+
+    record = [0, 0]
+    for e in range(trial_len):
+        frames.reset(pong.write_normalized_frame)
+        reward = 0
+        game_state = pong.get_normalized_state()
+
+        while reward == 0:
+            # process game state
+
+            frames.push(pong.write_normalized_frame)
+
+            # select action
+
+            action = None
+            if model_type == "state_label":
+                h, action_prob = model.forward(game_state)
+                action = 1 if rng.uniform() < action_prob[0] else 0
+            elif model_type == "direct_frame_label":
+                h, action_prob = model.forward(frames.latest())
+                action = 1 if rng.uniform() < action_prob[0] else 0
+            elif model_type == "frame_label":
+                h, action_prob = model.forward_stacked(frames.frames())
+                action = 1 if rng.uniform() < action_prob[0] else 0
+            elif model_type == "state_dqn":
+                h, action_values = model.forward(game_state)
+                action = 0 if action_values[0] >= action_values[1] else 1
+            elif model_type == "state_policy":
+                h, action_probs = model.forward(game_state)
+                action = rng.choice(action_probs.size, p=action_probs)
+
+            # advance game with action
+
+            reward, game_state = pong.step(action, 2)
+
+        # record final result
+
+        pong.reset()
+        if reward == 1:
+            record[0] += 1
+        else:
+            record[1] += 1
+
+    return checkpoint, trial, record
+
+if __name__ == "__main__":
+    print("save folder:", folder_path)
+    checkpoints = range(checkpoint_range[0], checkpoint_range[1] + 1)
+    records = {checkpoint: [None] * num_trials for checkpoint in checkpoints}
+    remaining = {checkpoint: num_trials for checkpoint in checkpoints}
+
+    with Executor(max_workers=num_workers, initializer=init_worker) as executor:
+        futures = [
+            executor.submit(run_trial, checkpoint, t)
+            for checkpoint in checkpoints
+            for t in range(num_trials)
+        ]
+
+        for future in as_completed(futures):
+            checkpoint, trial, record = future.result()
+            records[checkpoint][trial] = record
+            remaining[checkpoint] -= 1
+            if remaining[checkpoint] > 0:
+                continue
+
+            # process results once all trials of checkpoint finish
+
+            win_rates = [r[0] * 100 / (r[0] + r[1]) for r in records[checkpoint]]
+            mean_win_rate = sum(win_rates) / len(win_rates)
+            deviation = np.std(win_rates)
+            print(str(checkpoint) + ":", mean_win_rate, "±", deviation, flush=True)
@@ -6,24 +6,37 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute()))
 
-import copy
 from models.dqn_model import Model
+from models.dqn_trainer import DQNTrainer
+from models.prioritized_sampler import PrioritizedSampler
+from models.frame_replay_buffer import FrameReplayBuffer
+from models.frame_layout import apply_frame_layout
 import numpy as np
 import pong_rl
-import random
 
 # create or load model
 
 save_folder = "dqn_models"
 load_model = False
 checkpoint = 0
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+seed = None # set for reproducible runs
+rescale = 8 # game pixels per frame cell side
+crop = None # (left, top, right, bottom) game pixels to export, or None for the full frame
 log_interval = 1000
 save_interval = 1000
+dtype = np.float32
 print("save folder: " + save_folder)
 
+# create Pong environment exporting frames with the chosen layout
+
+pong = pong_rl.PongEnv.without_render(seed, float32=dtype == np.float32)
+pong.set_frame_layout(rescale, crop)
+
+np.random.seed(seed)
 model = None
 if load_model:
-    model = Model.from_save("agent/frame_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
+    model = Model.from_save("agent/frame_dqn/" + save_folder + "/" + str(checkpoint) + checkpoint_ext, dtype=dtype)
     print("loaded model with parameters ({}, {}, {}, {}, {}) from checkpoint {}".format(
         model.input_size,
         model.hidden_size,
@@ -34,13 +47,15 @@ if load_model:
     ))
 else:
     model = Model.with_random_weights(
-        12000, # input size
+        pong.frame_len * 2, # input size of two stacked frames
         600, # hidden size
         2, # output size
         0.001, # learning rate
         0.99, # discount rate
         1, # explore factor
+        dtype,
     )
+    model.frame_layout = (rescale, crop)
     print("created new model with parameters ({}, {}, {}, {}, {})".format(
         model.input_size,
         model.hidden_size,
@@ -48,24 +63,43 @@ else:
         model.discount_rate,
         model.explore_factor,
     ))
+apply_frame_layout(pong, model, 2)
 
-# create Pong environment
+# initialize game stats
 
-pong = pong_rl.PongEnv.without_render()
 episode_num = 0
 wins = 0
 losses = 0
 
 # initialize training data
 
-target_model = copy.deepcopy(model)
-sync_interval = 8
+trainer = DQNTrainer(model)
+target_tau = 0.001 # fraction of online weights mixed into target model per train step
 
-transitions = []
 buffer_len = 40000
-buffer_index = 0
-
 batch_size = 32
+prioritized_replay = False # sample transitions by temporal difference error
+frame_len = model.input_size // 2
+replay_buffer = FrameReplayBuffer(
+    "agent/frame_dqn/" + save_folder + "/replay_frames.dat",
+    buffer_len,
+    frame_len,
+    batch_size,
+    batch_dtype=dtype,
+    sampler=PrioritizedSampler(buffer_len, beta_increment=1e-6) if prioritized_replay else None,
+)
+current_frame = np.empty(frame_len, dtype=np.uint8) # quantized like replay frames
+
+# sparse indices and values of nonzero cells of the current quantized frame,
+# dequantized the same way as replay batches so acting and training see the
+# same inputs
+
+def current_sparse_frame():
+    indices = np.flatnonzero(current_frame)
+    values = current_frame[indices].astype(dtype)
+    values *= 1 / 255
+    return indices, values
+
 explore_decay = 0.99975
 min_explore = 0.1
 
@@ -76,8 +110,9 @@ while True:
     pong.start()
     final_reward = 0
 
-    prev_frame = pong.get_normalized_frame()
-    stacked_frame = np.concatenate((prev_frame, prev_frame))
+    pong.write_normalized_frame(current_frame)
+    frame_indices, frame_values = current_sparse_frame()
+    previous_indices, previous_values = frame_indices, frame_values
 
     while final_reward == 0:
         # predict action
@@ -86,69 +121,32 @@ while True:
         if np.random.uniform() < model.explore_factor:
             action = 0 if np.random.uniform() < 0.5 else 1
         else:
-            h, action_values = model.forward(stacked_frame)
+            h, action_values = model.sparse_forward(
+                np.concatenate((previous_indices, frame_indices + frame_len)),
+                np.concatenate((previous_values, frame_values)),
+            )
             action = 0 if action_values[0] >= action_values[1] else 1
         
         # advance game state
         
-        final_reward = pong.tick(action)
-        if final_reward == 0:
-            final_reward = pong.tick(action)
-        next_frame = pong.get_normalized_frame()
-        next_stacked_frame = np.concatenate((prev_frame, next_frame))
+        final_reward, _ = pong.step(action, 2)
 
-        # store state transition
+        # store state transition and export next frame
 
-        transition = None
-        if final_reward == 0:
-            transition = (stacked_frame, action, final_reward, next_stacked_frame)
-        else:
-            transition = (stacked_frame, action, final_reward, None)
-        prev_frame = next_frame
-        stacked_frame = next_stacked_frame
+        replay_buffer.push(current_frame, action, final_reward, final_reward != 0)
+        previous_indices, previous_values = frame_indices, frame_values
+        pong.write_normalized_frame(current_frame)
+        frame_indices, frame_values = current_sparse_frame()
         
-        if len(transitions) < buffer_len:
-            transitions.append(transition)
+        if not replay_buffer.is_full():
             continue
-        else:
-            transitions[buffer_index] = transition
-            buffer_index = (buffer_index + 1) % buffer_len
         
         # train using random transitions from replay buffer
 
-        train_sample = random.sample(transitions, batch_size)
-        hidden_batch = np.zeros((model.hidden_size, model.input_size + 1))
-        output_batch = np.zeros((model.output_size, model.hidden_size + 1))
-
-        # batch calculate target values using target model
-
-        train_next = np.array([(np.zeros(model.input_size) if t[3] is None else t[3]) for t in train_sample])
-        h, action_values = target_model.batch_forward(train_next)
-        target_values = np.max(action_values, axis=0) * model.discount_rate
-        for t in range(batch_size):
-            if not (train_sample[t][3] is None):
-                target_values[t] += train_sample[t][2]
-            else:
-                target_values[t] = train_sample[t][2]
-        
-        # batch back propagate target values through model
-        
-        train_current = np.array([t[0] for t in train_sample])
-        hidden_outputs, predicted_values = model.batch_forward(train_current)
-        update_values = np.copy(np.transpose(predicted_values), order="C")
-        for t in range(batch_size):
-            update_values[t][train_sample[t][1]] = target_values[t]
-        
-        hidden_grads, output_grads, e = model.batch_back_prop(
-            train_current,
-            hidden_outputs,
-            predicted_values,
-            update_values
-        )
-        model.apply_gradients(
-            np.sum(hidden_grads, axis=0),
-            np.sum(output_grads, axis=0)
-        )
+        td_errors = trainer.train_step(replay_buffer.sample(), replay_buffer.sample_weights)
+        if prioritized_replay:
+            replay_buffer.update_priorities(td_errors)
+        trainer.soft_update_target(target_tau)
     
     # update stats counter
     
@@ -157,13 +155,10 @@ while True:
     else:
         wins += 1
 
-    # decay explore rate and update target model
+    # decay explore rate
 
-    if len(transitions) == buffer_len:
-        if model.explore_factor > min_explore:
-            model.explore_factor *= explore_decay
-        if episode_num % sync_interval == 0:
-            target_model = copy.deepcopy(model)
+    if replay_buffer.is_full() and model.explore_factor > min_explore:
+        model.explore_factor *= explore_decay
     
     # reset game environment
         
@@ -179,4 +174,5 @@ while True:
     
     if episode_num % save_interval == 0:
         checkpoint += 1
-        model.save("agent/frame_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
\ No newline at end of file
+        model.save("agent/frame_dqn/" + save_folder + "/" + str(checkpoint) + ".ckpt")
+        replay_buffer.flush()
\ No newline at end of file
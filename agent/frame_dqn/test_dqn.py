@@ -7,12 +7,14 @@ import sys
 sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute()))
 
 from models.dqn_model import Model
+from models.frame_layout import apply_frame_layout
 import numpy as np
 import pong_rl
 
 checkpoint = 1
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 save_folder = "dqn_models"
-model = Model.from_save("agent/frame_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
+model = Model.from_save("agent/frame_dqn/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
 print("loaded model with parameters ({}, {}, {}, {}, {}, {}) from checkpoint {}".format(
     model.input_size,
     model.hidden_size,
@@ -24,6 +26,7 @@ print("loaded model with parameters ({}, {}, {}, {}, {}, {}) from checkpoint {}"
 ))
 
 pong = pong_rl.PongEnv.with_render()
+apply_frame_layout(pong, model, 2)
 pong.start()
 
 while True:
@@ -39,8 +42,6 @@ while True:
         action = 0 if action_values[0] >= action_values[1] else 1
         print("action values:", action_values)
 
-        reward = pong.tick(action)
-        if reward == 0:
-            reward = pong.tick(action)
+        reward, _ = pong.step(action, 2)
     
     pong.reset()
\ No newline at end of file
@@ -7,6 +7,7 @@ import sys
 sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute()))
 
 from models.batch_model import Model
+from models.frame_layout import apply_frame_layout
 import numpy as np
 import pong_rl
 
@@ -14,10 +15,21 @@ import pong_rl
 
 load_model = False
 checkpoint = 0
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+seed = None # set for reproducible runs
+rescale = 8 # game pixels per frame cell side
+crop = None # (left, top, right, bottom) game pixels to export, or None for the full frame
+dtype = np.float32
 
+# create Pong environment exporting frames with the chosen layout
+
+pong = pong_rl.PongEnv.without_render(seed, float32=dtype == np.float32)
+pong.set_frame_layout(rescale, crop)
+
+np.random.seed(seed)
 model = None
 if load_model:
-    model = Model.from_save("agent/frame_label/batch_models/" + str(checkpoint) + ".json")
+    model = Model.from_save("agent/frame_label/batch_models/" + str(checkpoint) + checkpoint_ext, dtype=dtype)
     print("loaded model with parameters ({}, {}, {}) from checkpoint {}".format(
         model.input_size,
         model.hidden_size,
@@ -26,20 +38,23 @@ if load_model:
     ))
 else:
     model = Model.with_random_weights(
-        12000, # input size
+        pong.frame_len * 2, # input size of two stacked frames
         50, # hidden size
         1, # output size
         0.001, # learning rate
+        dtype,
     )
+    model.frame_layout = (rescale, crop)
     print("created new model with parameters ({}, {}, {})".format(
         model.input_size,
         model.hidden_size,
         model.learning_rate,
     ))
+apply_frame_layout(pong, model, 2)
+frame_len = pong.frame_len
 
-# create Pong environment
+# initialize game stats
 
-pong = pong_rl.PongEnv.without_render()
 episode_num = 0
 wins = 0
 losses = 0
@@ -48,24 +63,26 @@ while True:
     # initialize episode data
 
     pong.start()
-    prev_frame = pong.get_normalized_frame()
+    prev_indices, prev_values = pong.get_sparse_frame()
 
     episode_num += 1
-    episode_states = []
+    episode_indices = []
+    episode_values = []
     episode_hidden_outputs = []
     episode_probs = []
     episode_labels = []
     final_reward = 0
+    game_state = pong.get_normalized_state()
 
     while final_reward == 0:
         # predict action
 
-        game_state = pong.get_normalized_state()
-        current_frame = pong.get_normalized_frame()
-        stacked_frame = np.concatenate((prev_frame, current_frame))
-        prev_frame = current_frame
+        frame_indices, frame_values = pong.get_sparse_frame()
+        stacked_indices = np.concatenate((prev_indices, frame_indices + frame_len))
+        stacked_values = np.concatenate((prev_values, frame_values))
+        prev_indices, prev_values = frame_indices, frame_values
 
-        hidden_output, action_prob = model.forward(stacked_frame)
+        hidden_output, action_prob = model.sparse_forward(stacked_indices, stacked_values)
         action = 1 if np.random.uniform() < action_prob[0] else 0
 
         # calculate correct action
@@ -78,41 +95,44 @@ while True:
 
         # store action data
 
-        episode_states.append(stacked_frame)
+        episode_indices.append(stacked_indices)
+        episode_values.append(stacked_values)
         episode_hidden_outputs.append(hidden_output)
         episode_probs.append(action_prob)
         episode_labels.append(correct_action)
 
         # advance game by two frames to reduce horizon
         
-        final_reward = pong.tick(action)
-        if final_reward == 0:
-            final_reward = pong.tick(action)
+        final_reward, game_state = pong.step(action, 2)
     
     if final_reward == -1:
         losses += 1
     else:
         wins += 1
     
-    # back propagate labels through model
+    # back propagate labels through model, summing hidden gradients only over
+    # input columns touched during the episode
 
-    hidden_batch = np.zeros((model.hidden_size, model.input_size + 1))
-    output_batch = np.zeros((model.output_size, model.hidden_size + 1))
+    touched_indices = np.unique(np.concatenate(episode_indices))
+    hidden_batch = np.zeros((model.hidden_size, touched_indices.size + 1), dtype=dtype)
+    output_batch = np.zeros((model.output_size, model.hidden_size + 1), dtype=dtype)
     total_error = 0
 
-    for s in range(len(episode_states)):
-        hidden_grad, output_grad, error = model.back_prop(
-            episode_states[s],
+    for s in range(len(episode_labels)):
+        hidden_grad, output_grad, error = model.sparse_back_prop(
+            episode_indices[s],
+            episode_values[s],
             episode_hidden_outputs[s],
             episode_probs[s],
             episode_labels[s],
         )
 
-        hidden_batch += hidden_grad
+        hidden_batch[:, np.searchsorted(touched_indices, episode_indices[s])] += hidden_grad[:, :-1]
+        hidden_batch[:, -1] += hidden_grad[:, -1]
         output_batch += output_grad
         total_error += error
     
-    model.apply_gradients(hidden_batch, output_batch)
+    model.apply_sparse_gradients(touched_indices, hidden_batch, output_batch)
     
     # reset game environment
 
@@ -121,10 +141,10 @@ while True:
     if episode_num % 100 == 0:
         print("FINISHED EPISODE:", episode_num)
         print("wins and losses:", wins, losses)
-        print("average error:", total_error / len(episode_states))
+        print("average error:", total_error / len(episode_labels))
         wins = 0
         losses = 0
     
     if episode_num % 400 == 0:
         checkpoint += 1
-        model.save("agent/frame_label/batch_models/" + str(checkpoint) + ".json")
\ No newline at end of file
+        model.save("agent/frame_label/batch_models/" + str(checkpoint) + ".ckpt")
\ No newline at end of file
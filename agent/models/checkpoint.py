@@ -0,0 +1,110 @@
+'''
+model checkpoint files saved as JSON or as a binary format with a JSON header
+followed by raw weight arrays which can be memory-mapped when loading
+'''
+
+import json
+import numpy as np
+import os
+
+MAGIC = b"PONGRLCK"
+ALIGNMENT = 64
+
+# save model parameters and weights as JSON if the file name ends with .json and
+# as binary otherwise
+
+def save(file_path, params, weights):
+    if file_path.endswith(".json"):
+        save_json(file_path, params, weights)
+    else:
+        save_binary(file_path, params, weights)
+
+# load model parameters and weights from JSON or binary file detected by header,
+# falling back to the JSON file of the same checkpoint for older checkpoints
+# when a binary file does not exist
+
+def load(file_path, mmap_mode=None):
+    if file_path.endswith(".ckpt") and not os.path.exists(file_path):
+        json_path = file_path[:-len(".ckpt")] + ".json"
+        if os.path.exists(json_path):
+            file_path = json_path
+    with open(file_path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            file.seek(0)
+            model_data = json.loads(file.read())
+            weights = [np.array(w) for w in model_data.pop("weights")]
+            return model_data, weights
+
+        # read header describing weight arrays
+
+        header_len = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(header_len))
+        data_start = align(len(MAGIC) + 8 + header_len)
+
+        # read or map weight arrays
+
+        weights = []
+        for array in header["arrays"]:
+            dtype = np.dtype(array["dtype"])
+            shape = tuple(array["shape"])
+            if mmap_mode is None:
+                file.seek(data_start + array["offset"])
+                weights.append(np.fromfile(file, dtype=dtype, count=int(np.prod(shape))).reshape(shape))
+            else:
+                weights.append(np.memmap(
+                    file_path,
+                    dtype=dtype,
+                    mode=mmap_mode,
+                    offset=data_start + array["offset"],
+                    shape=shape,
+                ))
+        return header["params"], weights
+
+# read frame export rescale and crop saved with a frame model, or None for
+# models saved without them
+
+def load_frame_layout(params):
+    layout = params.get("frame_layout")
+    if layout is None:
+        return None
+    rescale, crop = layout
+    return rescale, None if crop is None else tuple(crop)
+
+def save_json(file_path, params, weights):
+    serialized_model = json.dumps(
+        {
+            **params,
+            "weights": [w.tolist() for w in weights],
+        },
+        indent=4,
+    )
+    with open(file_path, "w") as file:
+        file.write(serialized_model)
+
+def save_binary(file_path, params, weights):
+    # describe weight arrays with aligned offsets
+
+    arrays = []
+    offset = 0
+    for w in weights:
+        arrays.append({
+            "dtype": w.dtype.str,
+            "shape": list(w.shape),
+            "offset": offset,
+        })
+        offset += align(w.nbytes)
+    header = json.dumps({"params": params, "arrays": arrays}).encode()
+    data_start = align(len(MAGIC) + 8 + len(header))
+
+    # write header and raw weight arrays
+
+    with open(file_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        for w, array in zip(weights, arrays):
+            file.seek(data_start + array["offset"])
+            np.ascontiguousarray(w).tofile(file)
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
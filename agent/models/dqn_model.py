@@ -4,7 +4,7 @@ layer using relu for the hidden layer and linear activation for the output layer
 with batched gradient updates
 '''
 
-import json
+from . import checkpoint
 import numpy as np
 
 class Model:
@@ -15,10 +15,11 @@ class Model:
     discount_rate = None
     explore_factor = None
     weights = None
+    frame_layout = None
 
     # set model data
 
-    def __init__(self, input_size, hidden_size, output_size, learning_rate, discount_rate, explore_factor, weights):
+    def __init__(self, input_size, hidden_size, output_size, learning_rate, discount_rate, explore_factor, weights, frame_layout=None):
         self.input_size = input_size
         self.hidden_size = hidden_size
         self.output_size = output_size
@@ -26,16 +27,17 @@ class Model:
         self.discount_rate = discount_rate
         self.explore_factor = explore_factor
         self.weights = weights
+        self.frame_layout = frame_layout # frame export rescale and crop of frame inputs
 
     # create new model with random small weights
 
     @classmethod
-    def with_random_weights(self, input_size, hidden_size, output_size, learning_rate, discount_rate, explore_factor):
-        hidden_weights = np.empty((hidden_size, input_size + 1))
+    def with_random_weights(self, input_size, hidden_size, output_size, learning_rate, discount_rate, explore_factor, dtype=np.float64):
+        hidden_weights = np.empty((hidden_size, input_size + 1), dtype=dtype)
         hidden_weights[:, :-1] = np.random.randn(hidden_size, input_size) / 50 # initialize with small weights
         hidden_weights[:, -1] = 0
 
-        output_weights = np.empty((output_size, hidden_size + 1))
+        output_weights = np.empty((output_size, hidden_size + 1), dtype=dtype)
         output_weights[:, :-1] = np.random.randn(output_size, hidden_size) / 50 # initialize with small weights
         output_weights[:, -1] = 0
 
@@ -49,24 +51,23 @@ class Model:
             [hidden_weights, output_weights]
         )
 
-    # load model from file
+    # load model from JSON or binary checkpoint file, optionally memory-mapping
+    # binary weights and converting weights to a different float type
 
     @classmethod
-    def from_save(self, file_name):
-        model_data = None
-        with open(file_name, "r") as file:
-            model_data = json.load(file)
+    def from_save(self, file_name, mmap_mode=None, dtype=None):
+        params, weights = checkpoint.load(file_name, mmap_mode)
+        if dtype is not None:
+            weights = [w.astype(dtype, copy=False) for w in weights]
         return self(
-            model_data["input_size"],
-            model_data["hidden_size"],
-            model_data["output_size"],
-            model_data["learning_rate"],
-            model_data["discount_rate"],
-            model_data["explore_factor"],
-            [
-                np.array(model_data["weights"][0]),
-                np.array(model_data["weights"][1]),
-            ]
+            params["input_size"],
+            params["hidden_size"],
+            params["output_size"],
+            params["learning_rate"],
+            params["discount_rate"],
+            params["explore_factor"],
+            weights,
+            checkpoint.load_frame_layout(params),
         )
     
     # calculate forward propagation result
@@ -78,6 +79,40 @@ class Model:
 
         return hidden_output, output
 
+    # calculate forward propagation result from frame quantized to 0-255
+    # coverage levels, dequantizing after the first layer product
+
+    def quantized_forward(self, quantized_data):
+        hidden_output = np.dot(self.weights[0][:, :-1], quantized_data) * (1 / 255) + self.weights[0][:, -1]
+        np.maximum(hidden_output, 0, out=hidden_output) # relu activation
+        output = np.dot(self.weights[1][:, :-1], hidden_output) + self.weights[1][:, -1]
+
+        return hidden_output, output
+
+    # calculate forward propagation result from sparse input given as indices
+    # and values of nonzero inputs using only their hidden weight columns
+
+    def sparse_forward(self, indices, values):
+        hidden_output = np.dot(self.weights[0][:, indices], values) + self.weights[0][:, -1]
+        np.maximum(hidden_output, 0, out=hidden_output) # relu activation
+        output = np.dot(self.weights[1][:, :-1], hidden_output) + self.weights[1][:, -1]
+
+        return hidden_output, output
+
+    # calculate forward propagation result from a sequence of equal length
+    # frames without stacking them, using the hidden weight columns of each
+    # frame slot
+
+    def forward_stacked(self, frames):
+        frame_weights = self.weights[0][:, :-1].reshape(self.hidden_size, len(frames), -1)
+        hidden_output = self.weights[0][:, -1].copy()
+        for f, frame in enumerate(frames):
+            hidden_output += np.dot(frame_weights[:, f], frame)
+        np.maximum(hidden_output, 0, out=hidden_output) # relu activation
+        output = np.dot(self.weights[1][:, :-1], hidden_output) + self.weights[1][:, -1]
+
+        return hidden_output, output
+
     # calculate batched forward propagation result
 
     def batch_forward(self, input_batch):
@@ -93,7 +128,7 @@ class Model:
         # calculate gradients for output neuron using linear derivative
 
         output_deltas = output - expected # using linear derivative
-        output_gradients = np.empty((self.output_size, self.hidden_size + 1))
+        output_gradients = np.empty((self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
         output_gradients[:, :-1] = np.outer(output_deltas, hidden_output) # set output weight derivatives
         output_gradients[:, -1:] = np.reshape(output_deltas, (self.output_size, 1)) # bias is a fixed input
 
@@ -101,7 +136,7 @@ class Model:
 
         hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
         hidden_deltas = hidden_predeltas * (hidden_output > 0) # using relu derivative
-        hidden_gradients = np.empty((self.hidden_size, self.input_size + 1))
+        hidden_gradients = np.empty((self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
         hidden_gradients[:, :-1] = np.outer(hidden_deltas, input_data) # set hidden weight derivatives
         hidden_gradients[:, -1:] = np.reshape(hidden_deltas, (self.hidden_size, 1)) # bias is a fixed input
 
@@ -111,14 +146,17 @@ class Model:
         error = difference.dot(difference) / self.output_size
         return hidden_gradients, output_gradients, error
 
-    # calculate batched gradients with back propagation
+    # calculate batched gradients with back propagation, scaling each sample by
+    # its weight if provided
 
-    def batch_back_prop(self, input_batch, hidden_outputs, outputs, expected):
+    def batch_back_prop(self, input_batch, hidden_outputs, outputs, expected, sample_weights=None):
         # calculate gradients for output neuron using linear derivative
 
         batch_len = len(input_batch)
         output_deltas = np.transpose(outputs) - expected # using linear derivative
-        output_gradients = np.empty((batch_len, self.output_size, self.hidden_size + 1))
+        if sample_weights is not None:
+            output_deltas *= np.reshape(sample_weights, (batch_len, 1)) # importance sampling weights
+        output_gradients = np.empty((batch_len, self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
         output_gradients[:, :, :-1] = np.matmul(
             np.reshape(output_deltas, (batch_len, self.output_size, 1)), # stack output deltas for weight derivatives
             np.reshape(np.transpose(hidden_outputs), (batch_len, 1, self.hidden_size)) # stack hidden outputs
@@ -129,7 +167,7 @@ class Model:
 
         hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
         hidden_deltas = hidden_predeltas * (np.transpose(hidden_outputs) > 0) # using relu derivative
-        hidden_gradients = np.empty((batch_len, self.hidden_size, self.input_size + 1))
+        hidden_gradients = np.empty((batch_len, self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
         hidden_gradients[:, :, :-1] = np.matmul(
             np.reshape(hidden_deltas, (batch_len, self.hidden_size, 1)), # stack hidden deltas for weight derivatives
             np.reshape(input_batch, (batch_len, 1, self.input_size)) # stack input batch
@@ -142,16 +180,64 @@ class Model:
         errors = np.sum(difference * difference, axis=1) / self.output_size
         return hidden_gradients, output_gradients, errors
     
+    # calculate batched gradients summed over the batch with back propagation,
+    # adding to existing gradient arrays if provided and scaling each sample by
+    # its weight if provided
+
+    def batch_sum_back_prop(self, input_batch, hidden_outputs, outputs, expected, hidden_gradients=None, output_gradients=None, sample_weights=None):
+        if hidden_gradients is None:
+            hidden_gradients = np.zeros((self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
+        if output_gradients is None:
+            output_gradients = np.zeros((self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
+
+        # calculate gradients for output neuron using linear derivative
+
+        output_deltas = np.transpose(outputs) - expected # using linear derivative
+        if sample_weights is not None:
+            output_deltas *= np.reshape(sample_weights, (len(input_batch), 1)) # importance sampling weights
+        output_gradients[:, :-1] += np.dot(np.transpose(output_deltas), np.transpose(hidden_outputs)) # sum weight derivatives
+        output_gradients[:, -1] += np.sum(output_deltas, axis=0) # bias is a fixed input
+
+        # calculate gradients for hidden neurons using relu derivative
+
+        hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
+        hidden_deltas = hidden_predeltas * (np.transpose(hidden_outputs) > 0) # using relu derivative
+        hidden_gradients[:, :-1] += np.dot(np.transpose(hidden_deltas), input_batch) # sum weight derivatives
+        hidden_gradients[:, -1] += np.sum(hidden_deltas, axis=0) # bias is a fixed input
+
+        # return gradients and errors
+
+        difference = expected - np.transpose(outputs)
+        errors = np.sum(difference * difference, axis=1) / self.output_size
+        return hidden_gradients, output_gradients, errors
+    
     # update weights with gradients
 
     def apply_gradients(self, hidden_gradients, output_gradients):
         self.weights[0] -= self.learning_rate * hidden_gradients
         self.weights[1] -= self.learning_rate * output_gradients
     
-    # save model to file
+    # copy weights in place from a list of weight arrays
+
+    def copy_weights(self, weights):
+        for w, source in zip(self.weights, weights):
+            np.copyto(w, source)
+    
+    # move weights in place toward a list of weight arrays by a fraction tau
+    # without allocating temporary arrays
+
+    def soft_update(self, weights, tau):
+        for w, source in zip(self.weights, weights):
+            np.subtract(w, source, out=w)
+            np.multiply(w, 1 - tau, out=w)
+            np.add(w, source, out=w)
+    
+    # save model to file as JSON if the file name ends with .json and as binary
+    # otherwise
 
     def save(self, file_path):
-        serialized_model = json.dumps(
+        checkpoint.save(
+            file_path,
             {
                 "input_size": self.input_size,
                 "hidden_size": self.hidden_size,
@@ -159,12 +245,7 @@ class Model:
                 "learning_rate": self.learning_rate,
                 "discount_rate": self.discount_rate,
                 "explore_factor": self.explore_factor,
-                "weights": [
-                    self.weights[0].tolist(),
-                    self.weights[1].tolist(),
-                ],
+                "frame_layout": self.frame_layout,
             },
-            indent=4,
-        )
-        with open(file_path, "w") as file:
-            file.write(serialized_model)
\ No newline at end of file
+            self.weights,
+        )
\ No newline at end of file
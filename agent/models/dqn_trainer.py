@@ -0,0 +1,64 @@
+'''
+Deep Q-Network trainer calculating target values with a target model and
+applying batched gradient updates to the online model
+'''
+
+import copy
+import numpy as np
+
+class DQNTrainer:
+    model = None
+    target_model = None
+    hidden_gradients = None
+    output_gradients = None
+
+    # set online model and create persistent target model and gradient arrays
+
+    def __init__(self, model):
+        self.model = model
+        self.target_model = copy.deepcopy(model)
+        self.hidden_gradients = np.zeros((model.hidden_size, model.input_size + 1), dtype=model.weights[0].dtype)
+        self.output_gradients = np.zeros((model.output_size, model.hidden_size + 1), dtype=model.weights[0].dtype)
+
+    # train online model on batch of transitions weighted by optional importance
+    # sampling weights and return temporal difference errors
+
+    def train_step(self, batch, sample_weights=None):
+        states, actions, rewards, next_states, terminals = batch
+
+        # batch calculate target values using target model
+
+        h, action_values = self.target_model.batch_forward(next_states)
+        target_values = np.max(action_values, axis=0) * self.model.discount_rate
+        target_values[terminals] = 0 # no future value after game end
+        target_values += rewards
+
+        # set target values for selected actions and batch back propagate
+
+        hidden_outputs, predicted_values = self.model.batch_forward(states)
+        update_values = np.transpose(predicted_values).copy()
+        update_values[np.arange(len(actions)), actions] = target_values
+
+        self.hidden_gradients.fill(0)
+        self.output_gradients.fill(0)
+        hidden_grads, output_grads, _ = self.model.batch_sum_back_prop(
+            states,
+            hidden_outputs,
+            predicted_values,
+            update_values,
+            self.hidden_gradients,
+            self.output_gradients,
+            sample_weights,
+        )
+        self.model.apply_gradients(hidden_grads, output_grads)
+        return target_values - predicted_values[actions, np.arange(len(actions))]
+
+    # copy online model weights into target model in place
+
+    def sync_target(self):
+        self.target_model.copy_weights(self.model.weights)
+
+    # move target model weights toward online model weights by a fraction tau
+
+    def soft_update_target(self, tau):
+        self.target_model.soft_update(self.model.weights, tau)
@@ -0,0 +1,19 @@
+'''
+frame export layout shared between a frame model and the Pong environment
+feeding it
+'''
+
+# set environment frame layout saved with a frame model, keeping the current
+# layout for models saved without one, and check that the model input size
+# matches num_frames stacked frames of the layout
+
+def apply_frame_layout(pong, model, num_frames=1):
+    if model.frame_layout is not None:
+        pong.set_frame_layout(*model.frame_layout)
+    if model.input_size != pong.frame_len * num_frames:
+        raise ValueError("model input size {} does not match {} frames of {} cells with frame layout {}".format(
+            model.input_size,
+            num_frames,
+            pong.frame_len,
+            model.frame_layout,
+        ))
@@ -0,0 +1,214 @@
+'''
+implementation of a replay memory ring buffer for stacked frame observations that
+stores each frame once in a compact memory-mapped file and rebuilds stacked
+(previous, current) frames by index when sampling, with transition data written
+through to a second memory-mapped file alongside each frame so the buffer can be
+resumed after the process stops at any point
+'''
+
+import numpy as np
+import os
+
+TRANSITION_DTYPE = np.dtype([
+    ("step", np.int64), # push count, zero for empty slots
+    ("action", np.int64),
+    ("reward", np.float64),
+    ("terminal", bool),
+    ("start", bool),
+])
+MAX_REDRAWS = 100
+
+class FrameReplayBuffer:
+    file_path = None
+    capacity = None
+    frame_len = None
+    batch_size = None
+    frame_scale = None
+    frames = None
+    transitions = None
+    steps = None
+    actions = None
+    rewards = None
+    terminals = None
+    starts = None
+    batch = None
+    index = None
+    size = None
+    episode_start = None
+    step = None
+    sampler = None
+    sample_indices = None
+    sample_weights = None
+
+    # open or create frame and transition files and allocate batch arrays, with
+    # sampled frames dequantized to the batch float type and sampling uniform
+    # unless a prioritized sampler is given
+
+    def __init__(self, file_path, capacity, frame_len, batch_size, dtype=np.uint8, batch_dtype=np.float64, sampler=None):
+        self.file_path = file_path
+        self.capacity = capacity
+        self.frame_len = frame_len
+        self.batch_size = batch_size
+        self.frame_scale = 1 / 255 if np.issubdtype(dtype, np.integer) else 1 # quantize integer frames to 0-255
+
+        self.batch = (
+            np.empty((batch_size, frame_len * 2), dtype=batch_dtype),
+            np.empty(batch_size, dtype=np.int64),
+            np.empty(batch_size),
+            np.empty((batch_size, frame_len * 2), dtype=batch_dtype),
+            np.empty(batch_size, dtype=bool),
+        )
+        self.index = 0
+        self.size = 0
+        self.episode_start = True
+        self.step = 0
+        self.sampler = sampler
+
+        # resume from existing buffer files after checking they were created with
+        # the same layout, otherwise create new files
+
+        mode = "w+"
+        if os.path.exists(file_path) and os.path.exists(self.meta_path()):
+            self.check_meta(np.dtype(dtype))
+            mode = "r+"
+        self.frames = np.memmap(file_path, dtype=dtype, mode=mode, shape=(capacity, frame_len))
+        self.transitions = np.memmap(self.transitions_path(), dtype=TRANSITION_DTYPE, mode=mode, shape=(capacity,))
+        self.steps = self.transitions["step"]
+        self.actions = self.transitions["action"]
+        self.rewards = self.transitions["reward"]
+        self.terminals = self.transitions["terminal"]
+        self.starts = self.transitions["start"]
+
+        if mode == "w+":
+            with open(self.meta_path(), "wb") as file:
+                np.savez(file, capacity=capacity, frame_len=frame_len, dtype=np.dtype(dtype).str)
+        else:
+            # find ring position from the newest stored transition
+
+            self.size = int(np.count_nonzero(self.steps))
+            if self.size > 0:
+                newest = int(np.argmax(self.steps))
+                self.step = int(self.steps[newest])
+                self.index = (newest + 1) % capacity
+            if sampler is not None:
+                sampler.tree.update(np.flatnonzero(self.steps), sampler.max_priority) # priorities are not saved
+
+    # store current frame of a transition with its action and reward, where the
+    # next frame is stored by the following transition of the same episode and
+    # frames already quantized like PongEnv.get_quantized_frame are copied as is,
+    # writing the step count last to mark the slot complete
+
+    def push(self, frame, action, reward, terminal):
+        if self.sampler is not None:
+            self.sampler.push(self.index)
+        self.steps[self.index] = 0
+        if self.frame_scale == 1 or frame.dtype == self.frames.dtype:
+            self.frames[self.index] = frame
+        else:
+            self.frames[self.index] = np.rint(frame / self.frame_scale)
+        self.actions[self.index] = action
+        self.rewards[self.index] = reward
+        self.terminals[self.index] = terminal
+        self.starts[self.index] = self.episode_start
+        self.episode_start = terminal
+        self.step += 1
+        self.steps[self.index] = self.step
+
+        self.index = (self.index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def __len__(self):
+        return self.size
+
+    def is_full(self):
+        return self.size == self.capacity
+
+    # sample random transitions with complete stacked frames into batch arrays
+    # which are reused between calls, keeping sampled indices and importance
+    # sampling weights when prioritized, and drawing remaining transitions
+    # uniformly from all complete ones after repeated misses
+
+    def sample(self):
+        indices = self.draw_indices(self.batch_size)
+        invalid = self.missing_frames(indices)
+        redraws = 0
+        while np.any(invalid):
+            if redraws == MAX_REDRAWS:
+                valid = np.flatnonzero(~self.missing_frames(np.arange(self.size)))
+                if valid.size == 0:
+                    raise ValueError("no stored transitions have complete stacked frames to sample")
+                indices[invalid] = np.random.choice(valid, np.count_nonzero(invalid))
+                break
+            indices[invalid] = self.draw_indices(np.count_nonzero(invalid))
+            invalid = self.missing_frames(indices)
+            redraws += 1
+        if self.sampler is not None:
+            self.sample_indices = indices
+            self.sample_weights = self.sampler.weights(indices, self.size)
+
+        # find previous and next frames within the episode
+
+        prev_indices = np.where(self.starts[indices], indices, (indices - 1) % self.capacity)
+        next_indices = np.where(self.terminals[indices], indices, (indices + 1) % self.capacity)
+
+        # gather stacked frames and transition data
+
+        states, actions, rewards, next_states, terminals = self.batch
+        states[:, :self.frame_len] = self.frames[prev_indices]
+        states[:, self.frame_len:] = self.frames[indices]
+        next_states[:, :self.frame_len] = self.frames[indices]
+        next_states[:, self.frame_len:] = self.frames[next_indices]
+        if self.frame_scale != 1:
+            states *= self.frame_scale
+            next_states *= self.frame_scale
+
+        np.take(self.actions, indices, out=actions)
+        np.take(self.rewards, indices, out=rewards)
+        np.take(self.terminals, indices, out=terminals)
+        return self.batch
+
+    def draw_indices(self, count):
+        if self.sampler is None:
+            return np.random.randint(0, self.size, count)
+        return self.sampler.sample(count, self.size)
+
+    # update priorities of last sampled transitions from temporal difference
+    # errors
+
+    def update_priorities(self, td_errors):
+        self.sampler.update(self.sample_indices, td_errors)
+
+    # find transitions whose previous or next frame has been overwritten, not yet
+    # stored, or lost when the process stopped, using consecutive step counts
+
+    def missing_frames(self, indices):
+        steps = self.steps[indices]
+        prev_steps = self.steps[(indices - 1) % self.capacity]
+        next_steps = self.steps[(indices + 1) % self.capacity]
+
+        missing_next = ~self.terminals[indices] & ((next_steps != steps + 1) | self.starts[(indices + 1) % self.capacity])
+        missing_prev = ~self.starts[indices] & (prev_steps != steps - 1)
+        return (steps == 0) | missing_next | missing_prev
+
+    # write frames and transition data to disk, which only matters if the system
+    # stops since stopped processes leave memory-mapped writes in the files
+
+    def flush(self):
+        self.frames.flush()
+        self.transitions.flush()
+
+    # check that existing buffer files were created with the same capacity, frame
+    # length, and frame type, such as after changing the frame layout
+
+    def check_meta(self, dtype):
+        with np.load(self.meta_path()) as meta:
+            layout = {key: meta[key].item() for key in ("capacity", "frame_len", "dtype") if key in meta}
+        expected = {"capacity": self.capacity, "frame_len": self.frame_len, "dtype": dtype.str}
+        if layout != expected:
+            raise ValueError("replay buffer files at {} have layout {}, expected {}".format(self.file_path, layout, expected))
+
+    def meta_path(self):
+        return self.file_path + ".meta.npz"
+
+    def transitions_path(self):
+        return self.file_path + ".transitions"
@@ -0,0 +1,48 @@
+'''
+stack of the most recent frames in a circular buffer where every frame is
+written twice so the stacked frames are always a contiguous view
+'''
+
+import numpy as np
+
+class FrameStack:
+    depth = None
+    frame_len = None
+    buffer = None
+    index = None
+
+    # allocate buffer with two copies of each of depth frame slots
+
+    def __init__(self, depth, frame_len, dtype=np.float64):
+        self.depth = depth
+        self.frame_len = frame_len
+        self.buffer = np.zeros((depth * 2, frame_len), dtype=dtype)
+        self.index = 0
+
+    # write frame into next slot and its copy, with write_frame filling the
+    # given array like PongEnv.write_normalized_frame
+
+    def push(self, write_frame):
+        self.index = (self.index + 1) % self.depth
+        write_frame(self.buffer[self.index])
+        self.buffer[self.index + self.depth] = self.buffer[self.index]
+
+    # fill every slot with the same frame at the start of a game
+
+    def reset(self, write_frame):
+        write_frame(self.buffer[0])
+        self.buffer[1:] = self.buffer[0]
+        self.index = 0
+
+    # view of frames from oldest to newest
+
+    def frames(self):
+        return self.buffer[self.index + 1:self.index + 1 + self.depth]
+
+    # view of frames from oldest to newest as one stacked input
+
+    def stacked(self):
+        return self.frames().reshape(-1)
+
+    def latest(self):
+        return self.buffer[self.index]
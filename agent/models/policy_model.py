@@ -4,7 +4,7 @@ for the hidden layer and implicit softmax activation for the output layer with
 batched gradient updates
 '''
 
-import json
+from . import checkpoint
 import numpy as np
 
 class Model:
@@ -28,12 +28,12 @@ class Model:
     # create new model with He and Xavier initialization
 
     @classmethod
-    def with_random_weights(self, input_size, hidden_size, output_size, learning_rate, discount_rate):
-        hidden_weights = np.empty((hidden_size, input_size + 1))
+    def with_random_weights(self, input_size, hidden_size, output_size, learning_rate, discount_rate, dtype=np.float64):
+        hidden_weights = np.empty((hidden_size, input_size + 1), dtype=dtype)
         hidden_weights[:, :-1] = np.random.randn(hidden_size, input_size) / 50 # initialize with small weights
         hidden_weights[:, -1] = 0
 
-        output_weights = np.empty((output_size, hidden_size + 1))
+        output_weights = np.empty((output_size, hidden_size + 1), dtype=dtype)
         output_weights[:, :-1] = np.random.randn(output_size, hidden_size) / 50 # initialize with small weights
         output_weights[:, -1] = 0
 
@@ -46,23 +46,21 @@ class Model:
             [hidden_weights, output_weights]
         )
 
-    # load model from file
+    # load model from JSON or binary checkpoint file, optionally memory-mapping
+    # binary weights and converting weights to a different float type
 
     @classmethod
-    def from_save(self, file_name):
-        model_data = None
-        with open(file_name, "r") as file:
-            model_data = json.load(file)
+    def from_save(self, file_name, mmap_mode=None, dtype=None):
+        params, weights = checkpoint.load(file_name, mmap_mode)
+        if dtype is not None:
+            weights = [w.astype(dtype, copy=False) for w in weights]
         return self(
-            model_data["input_size"],
-            model_data["hidden_size"],
-            model_data["output_size"],
-            model_data["learning_rate"],
-            model_data["discount_rate"],
-            [
-                np.array(model_data["weights"][0]),
-                np.array(model_data["weights"][1]),
-            ]
+            params["input_size"],
+            params["hidden_size"],
+            params["output_size"],
+            params["learning_rate"],
+            params["discount_rate"],
+            weights,
         )
     
     # calculate forward propagation result
@@ -76,13 +74,26 @@ class Model:
 
         return hidden_output, output
 
+    # calculate batched forward propagation result from inputs laid out as
+    # (batch, input size), returning hidden outputs and outputs laid out as
+    # (size, batch) with one column per input
+
+    def batch_forward(self, input_batch):
+        hidden_outputs = np.dot(self.weights[0][:, :-1], np.transpose(input_batch)) + self.weights[0][:, -1:]
+        np.maximum(hidden_outputs, 0, out=hidden_outputs) # relu activation
+        outputs = np.dot(self.weights[1][:, :-1], hidden_outputs) + self.weights[1][:, -1:]
+        np.exp(outputs - np.max(outputs, axis=0), out=outputs) # softmax activation
+        outputs /= np.sum(outputs, axis=0)
+
+        return hidden_outputs, outputs
+
     # calculate gradients with back propagation
 
     def back_prop(self, input_data, hidden_output, output_probs, reward):
         # calculate gradients for output neuron using softmax derivative
 
         output_deltas = output_probs * reward # using softmax derivative and policy gradient
-        output_gradients = np.empty((self.output_size, self.hidden_size + 1))
+        output_gradients = np.empty((self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
         output_gradients[:, :-1] = np.outer(output_deltas, hidden_output) # set output weight derivatives
         output_gradients[:, -1:] = np.reshape(output_deltas, (self.output_size, 1)) # bias is a fixed input of 1
 
@@ -90,7 +101,7 @@ class Model:
 
         hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
         hidden_deltas = hidden_predeltas * (hidden_output > 0) # using relu derivative
-        hidden_gradients = np.empty((self.hidden_size, self.input_size + 1))
+        hidden_gradients = np.empty((self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
         hidden_gradients[:, :-1] = np.outer(hidden_deltas, input_data) # set hidden weight derivatives
         hidden_gradients[:, -1:] = np.reshape(hidden_deltas, (self.hidden_size, 1)) # bias is a fixed input of 1
 
@@ -98,23 +109,27 @@ class Model:
 
         return hidden_gradients, output_gradients
 
+    # calculate batched gradients with back propagation from inputs laid out as
+    # (batch, input size) and hidden outputs and output probabilities laid out
+    # as (size, batch) as returned by batch_forward
+
     def batch_back_prop(self, input_batch, hidden_outputs, output_probs, rewards):
         # calculate gradients for output neuron using softmax derivative
 
         batch_len = len(input_batch)
-        output_deltas = output_probs * rewards.reshape(-1, 1) # using softmax derivative and policy gradient
-        output_gradients = np.empty((batch_len, self.output_size, self.hidden_size + 1))
+        output_deltas = np.transpose(output_probs) * rewards.reshape(-1, 1) # using softmax derivative and policy gradient
+        output_gradients = np.empty((batch_len, self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
         output_gradients[:, :, :-1] = np.matmul(
             np.reshape(output_deltas, (batch_len, self.output_size, 1)), # stack output deltas for weight derivatives
-            np.reshape(hidden_outputs, (batch_len, 1, self.hidden_size)) # stack hidden outputs
+            np.reshape(np.transpose(hidden_outputs), (batch_len, 1, self.hidden_size)) # stack hidden outputs
         )
         output_gradients[:, :, -1:] = np.reshape(output_deltas, (batch_len, self.output_size, 1)) # bias is a fixed input
 
         # calculate gradients for hidden neurons using relu derivative
 
         hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
-        hidden_deltas = hidden_predeltas * (hidden_outputs > 0) # using relu derivative
-        hidden_gradients = np.empty((batch_len, self.hidden_size, self.input_size + 1))
+        hidden_deltas = hidden_predeltas * (np.transpose(hidden_outputs) > 0) # using relu derivative
+        hidden_gradients = np.empty((batch_len, self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
         hidden_gradients[:, :, :-1] = np.matmul(
             np.reshape(hidden_deltas, (batch_len, self.hidden_size, 1)), # stack hidden deltas for weight derivatives
             np.reshape(input_batch, (batch_len, 1, self.input_size)) # stack input batch
@@ -125,28 +140,57 @@ class Model:
 
         return hidden_gradients, output_gradients
 
+    # calculate batched gradients summed over the batch with back propagation,
+    # adding to existing gradient arrays if provided, with the same layouts as
+    # batch_back_prop
+
+    def batch_sum_back_prop(self, input_batch, hidden_outputs, output_probs, rewards, hidden_gradients=None, output_gradients=None):
+        if hidden_gradients is None:
+            hidden_gradients = np.zeros((self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
+        if output_gradients is None:
+            output_gradients = np.zeros((self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
+
+        # calculate gradients for output neuron using softmax derivative
+
+        output_deltas = np.transpose(output_probs) * rewards.reshape(-1, 1) # using softmax derivative and policy gradient
+        output_gradients[:, :-1] += np.dot(np.transpose(output_deltas), np.transpose(hidden_outputs)) # sum weight derivatives
+        output_gradients[:, -1] += np.sum(output_deltas, axis=0) # bias is a fixed input
+
+        # calculate gradients for hidden neurons using relu derivative
+
+        hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
+        hidden_deltas = hidden_predeltas * (np.transpose(hidden_outputs) > 0) # using relu derivative
+        hidden_gradients[:, :-1] += np.dot(np.transpose(hidden_deltas), input_batch) # sum weight derivatives
+        hidden_gradients[:, -1] += np.sum(hidden_deltas, axis=0) # bias is a fixed input
+
+        # return gradients
+
+        return hidden_gradients, output_gradients
+
     # update weights with gradients
 
     def apply_gradients(self, hidden_gradients, output_gradients):
         self.weights[0] -= self.learning_rate * hidden_gradients
         self.weights[1] -= self.learning_rate * output_gradients
 
-    # save model to file
+    # copy weights in place from a list of weight arrays
+
+    def copy_weights(self, weights):
+        for w, source in zip(self.weights, weights):
+            np.copyto(w, source)
+    
+    # save model to file as JSON if the file name ends with .json and as binary
+    # otherwise
 
     def save(self, file_path):
-        serialized_model = json.dumps(
+        checkpoint.save(
+            file_path,
             {
                 "input_size": self.input_size,
                 "hidden_size": self.hidden_size,
                 "output_size": self.output_size,
                 "learning_rate": self.learning_rate,
                 "discount_rate": self.discount_rate,
-                "weights": [
-                    self.weights[0].tolist(),
-                    self.weights[1].tolist(),
-                ],
             },
-            indent=4,
-        )
-        with open(file_path, "w") as file:
-            file.write(serialized_model)
\ No newline at end of file
+            self.weights,
+        )
\ No newline at end of file
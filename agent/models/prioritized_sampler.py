@@ -0,0 +1,62 @@
+'''
+proportional prioritized replay sampler choosing replay buffer indices with
+probability based on temporal difference errors using a sum tree and
+calculating importance sampling weights
+'''
+
+from .sum_tree import SumTree
+import numpy as np
+
+class PrioritizedSampler:
+    tree = None
+    alpha = None
+    beta = None
+    beta_increment = None
+    epsilon = None
+    max_priority = None
+
+    # create sum tree over buffer indices with prioritization exponent alpha and
+    # importance sampling exponent beta annealed toward 1 after each batch
+
+    def __init__(self, capacity, alpha=0.6, beta=0.4, beta_increment=0, epsilon=1e-6):
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+
+    # give newly stored transition the highest priority so it is sampled soon
+
+    def push(self, index):
+        self.tree.update([index], self.max_priority)
+
+    # sample indices by stratified prefix sums over total priority, kept
+    # strictly below the total so rounding cannot reach past the last
+    # nonzero priority
+
+    def sample(self, count, size):
+        total = self.tree.total()
+        segment = total / count
+        values = (np.arange(count) + np.random.uniform(size=count)) * segment
+        np.minimum(values, np.nextafter(total, 0), out=values)
+        return np.minimum(self.tree.find(values), size - 1)
+
+    # calculate importance sampling weights of sampled indices normalized by the
+    # largest weight in the batch, with priorities clamped to the smallest one
+    # update can set so a zero priority leaf cannot give infinite weights
+
+    def weights(self, indices, size):
+        priorities = np.maximum(self.tree.get(indices), self.epsilon ** self.alpha)
+        probs = priorities / self.tree.total()
+        weights = np.power(size * probs, -self.beta)
+        weights /= np.max(weights)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return weights
+
+    # set priorities of sampled indices from temporal difference errors
+
+    def update(self, indices, td_errors):
+        priorities = np.power(np.abs(td_errors) + self.epsilon, self.alpha)
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, np.max(priorities))
@@ -0,0 +1,93 @@
+'''
+implementation of a fixed size replay memory ring buffer backed by NumPy arrays
+with vectorized uniform or prioritized batch sampling
+'''
+
+import numpy as np
+
+class ReplayBuffer:
+    capacity = None
+    batch_size = None
+    states = None
+    actions = None
+    rewards = None
+    next_states = None
+    terminals = None
+    batch = None
+    index = None
+    size = None
+    sampler = None
+    sample_indices = None
+    sample_weights = None
+
+    # allocate transition storage and batch arrays with states of the given float
+    # type, sampling uniformly unless a prioritized sampler is given
+
+    def __init__(self, capacity, state_shape, batch_size, dtype=np.float64, sampler=None):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.states = np.zeros((capacity,) + state_shape, dtype=dtype)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros((capacity,) + state_shape, dtype=dtype)
+        self.terminals = np.zeros(capacity, dtype=bool)
+        self.batch = (
+            np.empty((batch_size,) + state_shape, dtype=dtype),
+            np.empty(batch_size, dtype=np.int64),
+            np.empty(batch_size),
+            np.empty((batch_size,) + state_shape, dtype=dtype),
+            np.empty(batch_size, dtype=bool),
+        )
+        self.index = 0
+        self.size = 0
+        self.sampler = sampler
+
+    # store transition and overwrite oldest transition when full, with a next
+    # state of None marking a terminal transition
+
+    def push(self, state, action, reward, next_state):
+        if self.sampler is not None:
+            self.sampler.push(self.index)
+        self.states[self.index] = state
+        self.actions[self.index] = action
+        self.rewards[self.index] = reward
+        if next_state is None:
+            self.next_states[self.index] = 0
+            self.terminals[self.index] = True
+        else:
+            self.next_states[self.index] = next_state
+            self.terminals[self.index] = False
+
+        self.index = (self.index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def __len__(self):
+        return self.size
+
+    def is_full(self):
+        return self.size == self.capacity
+
+    # sample random transitions into batch arrays which are reused between calls,
+    # keeping sampled indices and importance sampling weights when prioritized
+
+    def sample(self):
+        indices = None
+        if self.sampler is None:
+            indices = np.random.randint(0, self.size, self.batch_size)
+        else:
+            indices = self.sampler.sample(self.batch_size, self.size)
+            self.sample_indices = indices
+            self.sample_weights = self.sampler.weights(indices, self.size)
+
+        for array, batch_array in zip(
+            (self.states, self.actions, self.rewards, self.next_states, self.terminals),
+            self.batch,
+        ):
+            np.take(array, indices, axis=0, out=batch_array)
+        return self.batch
+
+    # update priorities of last sampled transitions from temporal difference
+    # errors
+
+    def update_priorities(self, td_errors):
+        self.sampler.update(self.sample_indices, td_errors)
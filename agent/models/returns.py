@@ -0,0 +1,76 @@
+'''
+discounted returns for batches of episodes with rewards given at the final
+state, written from precomputed discount powers into a reusable buffer one
+episode slice at a time
+'''
+
+import numpy as np
+
+class DiscountedReturns:
+    discount_rate = None
+    powers = None
+    episode_lens = None
+    final_rewards = None
+    num_episodes = None
+    num_states = None
+    returns = None
+
+    # allocate discount powers and return buffers for initial_len states over
+    # initial_episodes episodes, growing when exceeded
+
+    def __init__(self, discount_rate, initial_len, initial_episodes):
+        self.discount_rate = discount_rate
+        self.powers = np.power(discount_rate, np.arange(initial_len, dtype=np.float64))
+        self.episode_lens = np.empty(initial_episodes, dtype=np.int64)
+        self.final_rewards = np.empty(initial_episodes)
+        self.num_episodes = 0
+        self.num_states = 0
+        self.returns = np.empty(initial_len)
+
+    # record length and final reward of finished episode
+
+    def push_episode(self, num_states, final_reward):
+        if self.num_episodes == self.episode_lens.size:
+            self.episode_lens = np.resize(self.episode_lens, self.num_episodes * 2)
+            self.final_rewards = np.resize(self.final_rewards, self.num_episodes * 2)
+        self.episode_lens[self.num_episodes] = num_states
+        self.final_rewards[self.num_episodes] = final_reward
+        self.num_episodes += 1
+        self.num_states += num_states
+
+    # calculate final_reward * discount_rate ** (steps until episode end) for
+    # every recorded state and return view of returns in state order
+
+    def calc(self):
+        if self.num_states > self.returns.size:
+            self.returns = np.empty(self.num_states * 2)
+
+        episode_lens = self.episode_lens[:self.num_episodes]
+        max_len = int(np.max(episode_lens, initial=0))
+        if max_len > self.powers.size:
+            self.powers = np.power(self.discount_rate, np.arange(max_len * 2, dtype=np.float64))
+
+        # returns of each episode are its final reward times the reversed
+        # powers up to its length, written into its slice without temporaries
+
+        start = 0
+        for num_states, final_reward in zip(episode_lens, self.final_rewards[:self.num_episodes]):
+            end = start + num_states
+            np.multiply(self.powers[:num_states][::-1], final_reward, out=self.returns[start:end])
+            start = end
+        return self.returns[:self.num_states]
+
+    # shift and scale calculated returns in place to zero mean and unit variance
+
+    def normalize(self):
+        returns = self.returns[:self.num_states]
+        returns -= np.mean(returns)
+        returns /= np.std(returns)
+        return returns
+
+    def clear(self):
+        self.num_episodes = 0
+        self.num_states = 0
+
+    def len(self):
+        return self.num_states
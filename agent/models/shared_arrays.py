@@ -0,0 +1,65 @@
+'''
+group of NumPy arrays backed by one named shared memory block which other
+processes attach to by name instead of receiving pickled copies
+'''
+
+from multiprocessing import shared_memory
+import numpy as np
+
+ALIGNMENT = 64
+
+class SharedArrays:
+    specs = None
+    memory = None
+    arrays = None
+
+    # create shared memory block for arrays with the given shapes and types, or
+    # attach to an existing block by name
+
+    def __init__(self, specs, name=None):
+        self.specs = [(tuple(shape), np.dtype(dtype)) for shape, dtype in specs]
+
+        # find aligned array offsets
+
+        offsets = []
+        total_len = 0
+        for shape, dtype in self.specs:
+            offsets.append(total_len)
+            total_len += -(-int(np.prod(shape)) * dtype.itemsize // ALIGNMENT) * ALIGNMENT
+
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=max(total_len, 1))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.arrays = [
+            np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=offset)
+            for (shape, dtype), offset in zip(self.specs, offsets)
+        ]
+        if name is None:
+            for array in self.arrays:
+                array.fill(0)
+
+    # create shared memory block holding copies of existing arrays
+
+    @classmethod
+    def from_arrays(self, arrays):
+        shared = self([(array.shape, array.dtype) for array in arrays])
+        for shared_array, array in zip(shared.arrays, arrays):
+            np.copyto(shared_array, array)
+        return shared
+
+    # attach to the same block when sent to another process
+
+    def __reduce__(self):
+        return (SharedArrays, (self.specs, self.memory.name))
+
+    # release arrays and detach from block
+
+    def close(self):
+        self.arrays = None
+        self.memory.close()
+
+    # free block once all processes are done with it
+
+    def unlink(self):
+        self.memory.unlink()
@@ -0,0 +1,88 @@
+'''
+replay memory ring buffer stored in shared memory so several actor processes can
+push transitions while a learner process samples batches
+'''
+
+from .replay_buffer import ReplayBuffer
+from .shared_arrays import SharedArrays
+import multiprocessing
+import numpy as np
+
+class SharedReplayBuffer(ReplayBuffer):
+    state_shape = None
+    dtype = None
+    shared = None
+    lock = None
+    counters = None
+
+    # allocate shared transition storage with a lock guarding writes
+
+    def __init__(self, capacity, state_shape, batch_size, dtype=np.float64):
+        self.capacity = capacity
+        self.state_shape = state_shape
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.shared = SharedArrays([
+            ((capacity,) + state_shape, dtype),
+            ((capacity,), np.int64),
+            ((capacity,), np.float64),
+            ((capacity,) + state_shape, dtype),
+            ((capacity,), bool),
+            ((2,), np.int64), # next index and size
+        ])
+        self.lock = multiprocessing.Lock()
+        self.attach()
+
+    # bind shared storage arrays and allocate batch arrays owned by this process
+
+    def attach(self):
+        self.states, self.actions, self.rewards, self.next_states, self.terminals, self.counters = self.shared.arrays
+        self.batch = (
+            np.empty((self.batch_size,) + self.state_shape, dtype=self.dtype),
+            np.empty(self.batch_size, dtype=np.int64),
+            np.empty(self.batch_size),
+            np.empty((self.batch_size,) + self.state_shape, dtype=self.dtype),
+            np.empty(self.batch_size, dtype=bool),
+        )
+
+    # next index and size are shared between processes
+
+    @property
+    def index(self):
+        return int(self.counters[0])
+
+    @index.setter
+    def index(self, index):
+        self.counters[0] = index
+
+    @property
+    def size(self):
+        return int(self.counters[1])
+
+    @size.setter
+    def size(self, size):
+        self.counters[1] = size
+
+    def push(self, state, action, reward, next_state):
+        with self.lock:
+            super().push(state, action, reward, next_state)
+
+    def sample(self):
+        with self.lock:
+            return super().sample()
+
+    # send shared memory name and lock instead of arrays to other processes
+
+    def __getstate__(self):
+        return {
+            "capacity": self.capacity,
+            "state_shape": self.state_shape,
+            "batch_size": self.batch_size,
+            "dtype": self.dtype,
+            "shared": self.shared,
+            "lock": self.lock,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.attach()
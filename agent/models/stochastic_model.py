@@ -3,7 +3,7 @@ traditional mean squared error neural network model class with 1 hidden layer an
 1 output layer using relu for the hidden layer and sigmoid for the output layer
 '''
 
-import json
+from . import checkpoint
 import numpy as np
 
 class Model:
@@ -12,25 +12,27 @@ class Model:
     output_size = None
     learning_rate = None
     weights = None
+    frame_layout = None
 
     # set model data
 
-    def __init__(self, input_size, hidden_size, output_size, learning_rate, weights):
+    def __init__(self, input_size, hidden_size, output_size, learning_rate, weights, frame_layout=None):
         self.input_size = input_size
         self.hidden_size = hidden_size
         self.output_size = output_size
         self.learning_rate = learning_rate
         self.weights = weights
+        self.frame_layout = frame_layout # frame export rescale and crop of frame inputs
 
     # create new model with He and Xavier initialization
 
     @classmethod
-    def with_random_weights(self, input_size, hidden_size, output_size, learning_rate):
-        hidden_weights = np.empty((hidden_size, input_size + 1))
+    def with_random_weights(self, input_size, hidden_size, output_size, learning_rate, dtype=np.float64):
+        hidden_weights = np.empty((hidden_size, input_size + 1), dtype=dtype)
         hidden_weights[:, :-1] = np.random.randn(hidden_size, input_size) * np.sqrt(2 / input_size) # He initialization
         hidden_weights[:, -1] = 0
 
-        output_weights = np.empty((output_size, hidden_size + 1))
+        output_weights = np.empty((output_size, hidden_size + 1), dtype=dtype)
         output_weights[:, :-1] = np.random.randn(output_size, hidden_size) * np.sqrt(1 / hidden_size) # Xavier initialization
         output_weights[:, -1] = 0
 
@@ -42,22 +44,21 @@ class Model:
             [hidden_weights, output_weights]
         )
 
-    # load model from file
+    # load model from JSON or binary checkpoint file, optionally memory-mapping
+    # binary weights and converting weights to a different float type
 
     @classmethod
-    def from_save(self, file_name):
-        model_data = None
-        with open(file_name, "r") as file:
-            model_data = json.load(file)
+    def from_save(self, file_name, mmap_mode=None, dtype=None):
+        params, weights = checkpoint.load(file_name, mmap_mode)
+        if dtype is not None:
+            weights = [w.astype(dtype, copy=False) for w in weights]
         return self(
-            model_data["input_size"],
-            model_data["hidden_size"],
-            model_data["output_size"],
-            model_data["learning_rate"],
-            [
-                np.array(model_data["weights"][0]),
-                np.array(model_data["weights"][1]),
-            ]
+            params["input_size"],
+            params["hidden_size"],
+            params["output_size"],
+            params["learning_rate"],
+            weights,
+            checkpoint.load_frame_layout(params),
         )
     
     # calculate forward propagation result
@@ -70,13 +71,45 @@ class Model:
 
         return hidden_output, output
 
+    # calculate forward propagation result from frame quantized to 0-255
+    # coverage levels, dequantizing after the first layer product
+
+    def quantized_forward(self, quantized_data):
+        hidden_output = np.dot(self.weights[0][:, :-1], quantized_data) * (1 / 255) + self.weights[0][:, -1]
+        np.maximum(hidden_output, 0, out=hidden_output) # relu activation
+        output = np.dot(self.weights[1][:, :-1], hidden_output) + self.weights[1][:, -1]
+        output = 1 / (1 + np.exp(-output)) # sigmoid activation
+
+        return hidden_output, output
+
+    # calculate forward propagation result from sparse input given as indices
+    # and values of nonzero inputs using only their hidden weight columns
+
+    def sparse_forward(self, indices, values):
+        hidden_output = np.dot(self.weights[0][:, indices], values) + self.weights[0][:, -1]
+        np.maximum(hidden_output, 0, out=hidden_output) # relu activation
+        output = np.dot(self.weights[1][:, :-1], hidden_output) + self.weights[1][:, -1]
+        output = 1 / (1 + np.exp(-output)) # sigmoid activation
+
+        return hidden_output, output
+
+    # calculate batched forward propagation result
+
+    def batch_forward(self, input_batch):
+        hidden_outputs = np.dot(self.weights[0][:, :-1], np.transpose(input_batch)) + self.weights[0][:, -1:]
+        np.maximum(hidden_outputs, 0, out=hidden_outputs) # relu activation
+        outputs = np.dot(self.weights[1][:, :-1], hidden_outputs) + self.weights[1][:, -1:]
+        outputs = 1 / (1 + np.exp(-outputs)) # sigmoid activation
+
+        return hidden_outputs, outputs
+
     # update weights with back propagation
 
     def back_prop(self, input_data, hidden_output, output, expected):
         # calculate gradients for output neuron using sigmoid derivative
 
         output_deltas = (output - expected) * (output * (1 - output)) # using sigmoid derivative
-        output_gradients = np.empty((self.output_size, self.hidden_size + 1))
+        output_gradients = np.empty((self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
         output_gradients[:, :-1] = np.outer(output_deltas, hidden_output) # set output weight derivatives
         output_gradients[:, -1:] = np.reshape(output_deltas, (self.output_size, 1)) # bias is a fixed input of 1
 
@@ -84,7 +117,7 @@ class Model:
 
         hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
         hidden_deltas = hidden_predeltas * (hidden_output > 0) # using relu derivative
-        hidden_gradients = np.empty((self.hidden_size, self.input_size + 1))
+        hidden_gradients = np.empty((self.hidden_size, self.input_size + 1), dtype=self.weights[0].dtype)
         hidden_gradients[:, :-1] = np.outer(hidden_deltas, input_data) # set hidden weight derivatives
         hidden_gradients[:, -1:] = np.reshape(hidden_deltas, (self.hidden_size, 1)) # bias is a fixed input of 1
 
@@ -98,21 +131,52 @@ class Model:
         difference = expected - output
         return difference.dot(difference) / len(difference)
     
-    # save model to file
+    # update weights with back propagation from sparse input given as indices
+    # and values of nonzero inputs, changing only the hidden weight columns of
+    # those inputs
+
+    def sparse_back_prop(self, indices, values, hidden_output, output, expected):
+        # calculate gradients for output neuron using sigmoid derivative
+
+        output_deltas = (output - expected) * (output * (1 - output)) # using sigmoid derivative
+        output_gradients = np.empty((self.output_size, self.hidden_size + 1), dtype=self.weights[0].dtype)
+        output_gradients[:, :-1] = np.outer(output_deltas, hidden_output) # set output weight derivatives
+        output_gradients[:, -1:] = np.reshape(output_deltas, (self.output_size, 1)) # bias is a fixed input of 1
+
+        # calculate gradients for hidden neurons using relu derivative
+
+        hidden_predeltas = np.dot(output_deltas, self.weights[1][:, :-1]) # find total error per neuron
+        hidden_deltas = hidden_predeltas * (hidden_output > 0) # using relu derivative
+
+        # update touched hidden weight columns and model biases and output weights
+
+        self.weights[0][:, indices] -= self.learning_rate * np.outer(hidden_deltas, values)
+        self.weights[0][:, -1] -= self.learning_rate * hidden_deltas
+        self.weights[1] -= self.learning_rate * output_gradients
+
+        # return mean squared error
+
+        difference = expected - output
+        return difference.dot(difference) / len(difference)
+    
+    # copy weights in place from a list of weight arrays
+
+    def copy_weights(self, weights):
+        for w, source in zip(self.weights, weights):
+            np.copyto(w, source)
+    
+    # save model to file as JSON if the file name ends with .json and as binary
+    # otherwise
 
     def save(self, file_path):
-        serialized_model = json.dumps(
+        checkpoint.save(
+            file_path,
             {
                 "input_size": self.input_size,
                 "hidden_size": self.hidden_size,
                 "output_size": self.output_size,
                 "learning_rate": self.learning_rate,
-                "weights": [
-                    self.weights[0].tolist(),
-                    self.weights[1].tolist(),
-                ],
+                "frame_layout": self.frame_layout,
             },
-            indent=4,
-        )
-        with open(file_path, "w") as file:
-            file.write(serialized_model)
\ No newline at end of file
+            self.weights,
+        )
\ No newline at end of file
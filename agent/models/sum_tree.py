@@ -0,0 +1,47 @@
+'''
+array-backed binary sum tree over a fixed number of leaf priorities with
+vectorized leaf updates and prefix sum searches in O(log n) per element
+'''
+
+import numpy as np
+
+class SumTree:
+    capacity = None
+    leaf_start = None
+    tree = None
+
+    # allocate tree with a power of two leaves covering capacity
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.leaf_start = 1
+        while self.leaf_start < capacity:
+            self.leaf_start *= 2
+        self.tree = np.zeros(self.leaf_start * 2) # node 1 is the root
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[self.leaf_start + indices]
+
+    # set leaf priorities and recalculate sums of their ancestors level by level
+
+    def update(self, indices, priorities):
+        nodes = self.leaf_start + np.asarray(indices)
+        self.tree[nodes] = priorities
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[nodes * 2] + self.tree[nodes * 2 + 1]
+
+    # find leaves whose priority ranges contain the given prefix sums
+
+    def find(self, values):
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaf_start:
+            left_sums = self.tree[nodes * 2]
+            go_right = values >= left_sums
+            values -= left_sums * go_right
+            nodes = nodes * 2 + go_right
+        return np.minimum(nodes - self.leaf_start, self.capacity - 1)
@@ -0,0 +1,218 @@
+'''
+NumPy implementation of the Pong game core advancing a batch of games stored as
+arrays with one vectorized step, mirroring the Rust game physics and the
+normalized game state exported by the Pong environment
+'''
+
+import numpy as np
+
+# game configuration parameters matching the Rust core
+
+WIDTH = 800
+HEIGHT = 480
+BALL_SIZE = 14
+BALL_SPEED = 12.0
+MAX_BOUNCE_ANGLE = 65.0
+MAX_INITIAL_ANGLE = 40.0
+PADDLE_WIDTH = 10
+PADDLE_HEIGHT = 80
+PADDLE_SPEED = 6
+PADDLE_OFFSET = 12
+
+LEFT_BOUND = PADDLE_OFFSET + PADDLE_WIDTH
+RIGHT_BOUND = WIDTH - PADDLE_OFFSET - PADDLE_WIDTH - BALL_SIZE
+
+class VecPong:
+    num_games = None
+    rng = None
+    ball_x = None
+    ball_y = None
+    velocity_x = None
+    velocity_y = None
+    left_paddle = None
+    right_paddle = None
+
+    # create batch of games with initial state and optional random seed
+
+    def __init__(self, num_games, seed=None):
+        self.num_games = num_games
+        self.rng = np.random.default_rng(seed)
+        self.ball_x = np.empty(num_games)
+        self.ball_y = np.empty(num_games)
+        self.velocity_x = np.empty(num_games)
+        self.velocity_y = np.empty(num_games)
+        self.left_paddle = np.empty(num_games, dtype=np.int64)
+        self.right_paddle = np.empty(num_games, dtype=np.int64)
+        self.clear_games(np.ones(num_games, dtype=bool))
+
+    # advance each game with its action for up to repeat ticks and return
+    # stacked states, rewards, and done flags with finished games reset
+
+    def step(self, actions, repeat=1):
+        actions = np.asarray(actions)
+        if len(actions) != self.num_games:
+            raise ValueError("expected {} actions, got {}".format(self.num_games, len(actions)))
+
+        rewards = np.zeros(self.num_games, dtype=np.int32)
+        dones = np.zeros(self.num_games, dtype=bool)
+        for r in range(repeat):
+            active = ~dones
+            if not np.any(active):
+                break
+            rewards[active] = self.tick(actions, active)[active]
+            dones = rewards != 0
+
+        self.clear_games(dones)
+        return self.get_normalized_states(), rewards, dones
+
+    # advance active games by one tick and return rewards
+
+    def tick(self, actions, active):
+        # update player paddle positions
+
+        moves_up = active & (actions != 0)
+        moves_down = active & (actions == 0)
+        self.move_paddles(self.left_paddle, moves_up, moves_down)
+
+        # update bot paddle positions
+
+        bot_middle = self.right_paddle + PADDLE_HEIGHT // 2
+        ball_middle = np.floor(self.ball_y + 0.5).astype(np.int64) + BALL_SIZE // 2 # round half away from zero
+        follows = active & (np.abs(ball_middle - bot_middle) >= PADDLE_SPEED)
+        self.move_paddles(self.right_paddle, follows & (ball_middle < bot_middle), follows & (ball_middle > bot_middle))
+
+        # update ball positions
+
+        return self.move_balls(self.ball_x + self.velocity_x, self.ball_y + self.velocity_y, active)
+
+    # move balls with collision detection and return rewards for ended games
+
+    def move_balls(self, to_x, to_y, active):
+        # bounce off top and bottom walls until no wall is crossed
+
+        while True:
+            top = active & (to_y < 0)
+            bottom = active & ~top & (to_y >= HEIGHT - BALL_SIZE)
+            if not np.any(top | bottom):
+                break
+
+            bounced = top | bottom
+            on_top = top[bounced]
+            extra_dy = to_y[bounced] - np.where(on_top, 0, HEIGHT - BALL_SIZE)
+            bounce_dx = self.velocity_x[bounced] * (extra_dy / self.velocity_y[bounced])
+            remaining_dx = self.velocity_x[bounced] - bounce_dx
+
+            self.ball_x[bounced] += bounce_dx
+            self.ball_y[bounced] = np.where(on_top, 0, HEIGHT - BALL_SIZE)
+            self.velocity_y[bounced] *= -1
+            to_x[bounced] = self.ball_x[bounced] + remaining_dx
+            to_y[bounced] = np.where(on_top, -extra_dy, (HEIGHT - BALL_SIZE) - extra_dy)
+
+        # check for left and right paddle collisions
+
+        prev_x = to_x - self.velocity_x
+        left_hit = (
+            active
+            & (to_x <= LEFT_BOUND)
+            & (prev_x >= LEFT_BOUND)
+            & (to_y > self.left_paddle - BALL_SIZE)
+            & (to_y < self.left_paddle + PADDLE_HEIGHT)
+        )
+        right_hit = (
+            active
+            & ~left_hit
+            & (to_x >= RIGHT_BOUND)
+            & (prev_x <= RIGHT_BOUND)
+            & (to_y > self.right_paddle - BALL_SIZE)
+            & (to_y < self.right_paddle + PADDLE_HEIGHT)
+        )
+        self.bounce_off_paddles(to_x, left_hit, right_hit)
+
+        # check for left or right wall collisions ending games
+
+        free = active & ~(left_hit | right_hit)
+        lost = free & (to_x <= 0)
+        won = free & ~lost & (to_x >= WIDTH - BALL_SIZE)
+        moves = free & ~(lost | won)
+        self.ball_x[moves] = to_x[moves]
+        self.ball_y[moves] = to_y[moves]
+
+        return won.astype(np.int32) - lost.astype(np.int32)
+
+    # move balls against paddles and change ball velocities based on bounce
+    # positions
+
+    def bounce_off_paddles(self, to_x, left_hit, right_hit):
+        hit = left_hit | right_hit
+        if not np.any(hit):
+            return
+
+        on_left = left_hit[hit]
+        extra_dx = np.where(on_left, LEFT_BOUND - to_x[hit], to_x[hit] - RIGHT_BOUND)
+        bounce_dy = self.velocity_y[hit] * (extra_dx / self.velocity_x[hit])
+        self.ball_x[hit] = np.where(on_left, LEFT_BOUND, RIGHT_BOUND)
+        self.ball_y[hit] += bounce_dy
+
+        paddle_y = np.where(on_left, self.left_paddle[hit], self.right_paddle[hit])
+        angle = np.radians(self.calc_bounce_angles(self.ball_y[hit], paddle_y))
+        self.velocity_x[hit] = np.where(on_left, 1, -1) * BALL_SPEED * np.cos(angle)
+        self.velocity_y[hit] = BALL_SPEED * np.sin(angle)
+
+    # calculate ball bounce angles off paddles
+
+    def calc_bounce_angles(self, ball_y, paddle_y):
+        ball_center = ball_y + BALL_SIZE / 2
+        paddle_center = paddle_y + PADDLE_HEIGHT / 2
+        real_offset = 2 * (ball_center - paddle_center) / PADDLE_HEIGHT
+
+        scale_factor = np.sign(real_offset) * np.power(np.abs(real_offset), 0.75)
+        return scale_factor * MAX_BOUNCE_ANGLE
+
+    # move paddles up or down considering wall bounds
+
+    def move_paddles(self, paddles, up, down):
+        paddles[up] = np.maximum(paddles[up] - PADDLE_SPEED, 0)
+        paddles[down] = np.minimum(paddles[down] + PADDLE_SPEED, HEIGHT - PADDLE_HEIGHT)
+
+    # reset selected games to initial state with random initial velocities
+
+    def clear_games(self, games):
+        count = np.count_nonzero(games)
+        angles = np.radians(self.rng.uniform(-MAX_INITIAL_ANGLE, MAX_INITIAL_ANGLE, count))
+        self.ball_x[games] = WIDTH // 2 - BALL_SIZE // 2
+        self.ball_y[games] = HEIGHT // 2 - BALL_SIZE // 2
+        self.velocity_x[games] = BALL_SPEED * np.cos(angles)
+        self.velocity_y[games] = BALL_SPEED * np.sin(angles)
+        self.left_paddle[games] = HEIGHT // 2 - PADDLE_HEIGHT // 2
+        self.right_paddle[games] = HEIGHT // 2 - PADDLE_HEIGHT // 2
+
+    # reset all games to initial state
+
+    def reset(self):
+        self.clear_games(np.ones(self.num_games, dtype=bool))
+
+    # normalize full internal game states to the range [-1, 1] stacked by game
+
+    def get_normalized_states(self):
+        states = np.empty((self.num_games, 6))
+        states[:, 0] = ((self.ball_x + BALL_SIZE / 2) / WIDTH - 0.5) * 2 # ball x position
+        states[:, 1] = ((self.ball_y + BALL_SIZE / 2) / HEIGHT - 0.5) * 2 # ball y position
+        states[:, 2] = self.velocity_x / BALL_SPEED # ball x velocity
+        states[:, 3] = self.velocity_y / BALL_SPEED # ball y velocity
+        states[:, 4] = ((self.left_paddle + PADDLE_HEIGHT / 2) / HEIGHT - 0.5) * 2 # left paddle y position
+        states[:, 5] = ((self.right_paddle + PADDLE_HEIGHT / 2) / HEIGHT - 0.5) * 2 # right paddle y position
+        return states
+
+    # set selected games from normalized game states such as those exported by
+    # the Rust environment
+
+    def set_normalized_states(self, states, games=None):
+        if games is None:
+            games = np.ones(self.num_games, dtype=bool)
+        states = states[games]
+        self.ball_x[games] = (states[:, 0] / 2 + 0.5) * WIDTH - BALL_SIZE / 2
+        self.ball_y[games] = (states[:, 1] / 2 + 0.5) * HEIGHT - BALL_SIZE / 2
+        self.velocity_x[games] = states[:, 2] * BALL_SPEED
+        self.velocity_y[games] = states[:, 3] * BALL_SPEED
+        self.left_paddle[games] = np.rint((states[:, 4] / 2 + 0.5) * HEIGHT - PADDLE_HEIGHT / 2)
+        self.right_paddle[games] = np.rint((states[:, 5] / 2 + 0.5) * HEIGHT - PADDLE_HEIGHT / 2)
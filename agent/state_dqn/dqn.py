@@ -6,24 +6,28 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute()))
 
-import copy
 from models.dqn_model import Model
+from models.dqn_trainer import DQNTrainer
+from models.prioritized_sampler import PrioritizedSampler
+from models.replay_buffer import ReplayBuffer
 import numpy as np
 import pong_rl
-import random
 
 # create or load model
 
 save_folder = "dqn_models"
 load_model = False
 checkpoint = 0
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+seed = None # set for reproducible runs
 log_interval = 1000
 save_interval = 1000
 print("save folder: " + save_folder)
 
+np.random.seed(seed)
 model = None
 if load_model:
-    model = Model.from_save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
+    model = Model.from_save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
     print("loaded model with parameters ({}, {}, {}, {}, {}) from checkpoint {}".format(
         model.input_size,
         model.hidden_size,
@@ -51,21 +55,26 @@ else:
 
 # create Pong environment
 
-pong = pong_rl.PongEnv.without_render()
+pong = pong_rl.PongEnv.without_render(seed)
 episode_num = 0
 wins = 0
 losses = 0
 
 # initialize training data
 
-target_model = copy.deepcopy(model)
-sync_interval = 8
+trainer = DQNTrainer(model)
+target_tau = 0.001 # fraction of online weights mixed into target model per train step
 
-transitions = []
 buffer_len = 40000
-buffer_index = 0
-
 batch_size = 32
+prioritized_replay = False # sample transitions by temporal difference error
+replay_buffer = ReplayBuffer(
+    buffer_len,
+    (model.input_size,),
+    batch_size,
+    sampler=PrioritizedSampler(buffer_len, beta_increment=1e-6) if prioritized_replay else None,
+)
+
 explore_decay = 0.99975
 min_explore = 0.1
 
@@ -89,61 +98,25 @@ while True:
         
         # advance game state
         
-        final_reward = pong.tick(action)
-        if final_reward == 0:
-            final_reward = pong.tick(action)
-        next_state = pong.get_normalized_state()
+        final_reward, next_state = pong.step(action, 2)
 
         # store state transition
 
-        transition = None
         if final_reward == 0:
-            transition = (game_state, action, final_reward, next_state)
+            replay_buffer.push(game_state, action, final_reward, next_state)
         else:
-            transition = (game_state, action, final_reward, None)
+            replay_buffer.push(game_state, action, final_reward, None)
         game_state = next_state
         
-        if len(transitions) < buffer_len:
-            transitions.append(transition)
+        if not replay_buffer.is_full():
             continue
-        else:
-            transitions[buffer_index] = transition
-            buffer_index = (buffer_index + 1) % buffer_len
         
         # train using random transitions from replay buffer
 
-        train_sample = random.sample(transitions, batch_size)
-        hidden_batch = np.zeros((model.hidden_size, model.input_size + 1))
-        output_batch = np.zeros((model.output_size, model.hidden_size + 1))
-
-        # batch calculate target values using target model
-
-        train_next = np.array([(np.zeros(model.input_size) if t[3] is None else t[3]) for t in train_sample])
-        h, action_values = target_model.batch_forward(train_next)
-        target_values = np.max(action_values, axis=0) * model.discount_rate
-        for t in range(batch_size):
-            if not (train_sample[t][3] is None):
-                target_values[t] += train_sample[t][2]
-            else:
-                target_values[t] = train_sample[t][2]
-
-        for t in range(batch_size):
-            # back propagate target values through model
-            
-            hidden_output, predicted_values = model.forward(train_sample[t][0])
-            update_values = np.copy(predicted_values)
-            update_values[train_sample[t][1]] = target_values[t]
-            hidden_grad, output_grad, error = model.back_prop(
-                train_sample[t][0],
-                hidden_output,
-                predicted_values,
-                update_values
-            )
-
-            hidden_batch += hidden_grad
-            output_batch += output_grad
-        
-        model.apply_gradients(hidden_batch, output_batch)
+        td_errors = trainer.train_step(replay_buffer.sample(), replay_buffer.sample_weights)
+        if prioritized_replay:
+            replay_buffer.update_priorities(td_errors)
+        trainer.soft_update_target(target_tau)
     
     # update stats counter
     
@@ -152,13 +125,10 @@ while True:
     else:
         wins += 1
 
-    # decay explore rate and update target model
+    # decay explore rate
 
-    if len(transitions) == buffer_len:
-        if model.explore_factor > min_explore:
-            model.explore_factor *= explore_decay
-        if episode_num % sync_interval == 0:
-            target_model = copy.deepcopy(model)
+    if replay_buffer.is_full() and model.explore_factor > min_explore:
+        model.explore_factor *= explore_decay
     
     # reset game environment
         
@@ -174,4 +144,4 @@ while True:
     
     if episode_num % save_interval == 0:
         checkpoint += 1
-        model.save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
\ No newline at end of file
+        model.save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + ".ckpt")
\ No newline at end of file
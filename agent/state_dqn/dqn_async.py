@@ -0,0 +1,203 @@
+'''
+Deep Q-Network learning with full state of Pong environment using actor
+processes collecting transitions into a shared replay buffer while a learner
+process trains continuously
+'''
+
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute()))
+
+from models.dqn_model import Model
+from models.dqn_trainer import DQNTrainer
+from models.shared_arrays import SharedArrays
+from models.shared_replay_buffer import SharedReplayBuffer
+import multiprocessing
+import numpy as np
+import pong_rl
+import queue
+import time
+
+# training parameters
+
+save_folder = "dqn_models"
+load_model = False
+checkpoint = 0
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+seed = None # set for reproducible actor environments
+log_interval = 1000
+save_interval = 1000
+
+num_actors = 4
+publish_interval = 50 # learner steps between weight broadcasts to actors
+sync_interval = 8 # episodes between target model updates
+buffer_len = 40000
+batch_size = 32
+explore_decay = 0.99975
+min_explore = 0.1
+
+# play games with the latest broadcast weights and push transitions into the
+# replay buffer
+
+def run_actor(actor_id, model, replay_buffer, shared_weights, weights_lock, results):
+    np.random.seed(None if seed is None else seed + actor_id)
+    pong = pong_rl.PongEnv.without_render(None if seed is None else seed + actor_id)
+    weights_version, explore_factor = shared_weights.arrays[-2:]
+    local_version = -1
+
+    while True:
+        # copy broadcast weights when updated
+
+        if weights_version[0] != local_version:
+            with weights_lock:
+                model.copy_weights(shared_weights.arrays)
+                local_version = weights_version[0]
+
+        # play game and store state transitions
+
+        pong.start()
+        game_state = pong.get_normalized_state()
+        final_reward = 0
+
+        while final_reward == 0:
+            action = None
+            if np.random.uniform() < explore_factor[0]:
+                action = 0 if np.random.uniform() < 0.5 else 1
+            else:
+                h, action_values = model.forward(game_state)
+                action = 0 if action_values[0] >= action_values[1] else 1
+
+            final_reward, next_state = pong.step(action, 2)
+            if final_reward == 0:
+                replay_buffer.push(game_state, action, final_reward, next_state)
+            else:
+                replay_buffer.push(game_state, action, final_reward, None)
+            game_state = next_state
+
+        pong.reset()
+        results.put(final_reward)
+
+# copy online model weights and explore factor into shared memory for actors
+
+def publish_weights(model, shared_weights, weights_lock):
+    weights_version, explore_factor = shared_weights.arrays[-2:]
+    with weights_lock:
+        for w, shared_w in zip(model.weights, shared_weights.arrays):
+            np.copyto(shared_w, w)
+        explore_factor[0] = model.explore_factor
+        weights_version[0] += 1
+
+if __name__ == "__main__":
+    print("save folder: " + save_folder)
+
+    # create or load model
+
+    np.random.seed(seed)
+    model = None
+    if load_model:
+        model = Model.from_save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
+        print("loaded model with parameters ({}, {}, {}, {}, {}) from checkpoint {}".format(
+            model.input_size,
+            model.hidden_size,
+            model.learning_rate,
+            model.discount_rate,
+            model.explore_factor,
+            checkpoint,
+        ))
+    else:
+        model = Model.with_random_weights(
+            6, # input size
+            300, # hidden size
+            2, # output size
+            0.001, # learning rate
+            0.99, # discount rate
+            1, # explore factor
+        )
+        print("created new model with parameters ({}, {}, {}, {}, {})".format(
+            model.input_size,
+            model.hidden_size,
+            model.learning_rate,
+            model.discount_rate,
+            model.explore_factor,
+        ))
+
+    # create shared replay buffer and weights followed by weights version and
+    # explore factor
+
+    trainer = DQNTrainer(model)
+    replay_buffer = SharedReplayBuffer(buffer_len, (model.input_size,), batch_size)
+    shared_weights = SharedArrays.from_arrays(
+        model.weights + [np.zeros(1, dtype=np.int64), np.array([model.explore_factor])]
+    )
+    weights_lock = multiprocessing.Lock()
+
+    # start actor processes
+
+    results = multiprocessing.Queue()
+    actors = [
+        multiprocessing.Process(
+            target=run_actor,
+            args=(a, model, replay_buffer, shared_weights, weights_lock, results),
+            daemon=True,
+        )
+        for a in range(num_actors)
+    ]
+    for actor in actors:
+        actor.start()
+
+    episode_num = 0
+    train_steps = 0
+    wins = 0
+    losses = 0
+
+    try:
+        while True:
+            # train using random transitions from replay buffer once full
+
+            if replay_buffer.is_full():
+                trainer.train_step(replay_buffer.sample())
+                train_steps += 1
+                if train_steps % publish_interval == 0:
+                    publish_weights(model, shared_weights, weights_lock)
+            else:
+                time.sleep(0.01)
+
+            # process finished actor episodes
+
+            while True:
+                try:
+                    final_reward = results.get_nowait()
+                except queue.Empty:
+                    break
+
+                episode_num += 1
+                if final_reward == -1:
+                    losses += 1
+                else:
+                    wins += 1
+
+                # decay explore rate and update target model
+
+                if replay_buffer.is_full():
+                    if model.explore_factor > min_explore:
+                        model.explore_factor *= explore_decay
+                    if episode_num % sync_interval == 0:
+                        trainer.sync_target()
+
+                if episode_num % log_interval == 0:
+                    print("FINISHED EPISODE:", episode_num)
+                    print("wins and losses:", wins, losses)
+                    print("explore factor:", model.explore_factor)
+                    print("train steps:", train_steps)
+
+                    wins = 0
+                    losses = 0
+
+                if episode_num % save_interval == 0:
+                    checkpoint += 1
+                    model.save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + ".ckpt")
+    finally:
+        for actor in actors:
+            actor.terminate()
+        replay_buffer.shared.unlink()
+        shared_weights.unlink()
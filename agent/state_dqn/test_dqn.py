@@ -10,8 +10,9 @@ from models.dqn_model import Model
 import pong_rl
 
 checkpoint = 28
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 save_folder = "dqn_models"
-model = Model.from_save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
+model = Model.from_save("agent/state_dqn/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
 print("loaded model with parameters ({}, {}, {}, {}, {}, {}) from checkpoint {}".format(
     model.input_size,
     model.hidden_size,
@@ -27,15 +28,13 @@ pong.start()
 
 while True:
     reward = 0
+    game_state = pong.get_normalized_state()
     
     while reward == 0:
-        game_state = pong.get_normalized_state()
         h, action_values = model.forward(game_state)
         action = 0 if action_values[0] >= action_values[1] else 1
         print("action values:", action_values)
 
-        reward = pong.tick(action)
-        if reward == 0:
-            reward = pong.tick(action)
+        reward, game_state = pong.step(action, 2)
     
     pong.reset()
\ No newline at end of file
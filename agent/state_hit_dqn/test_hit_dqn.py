@@ -10,8 +10,9 @@ from models.dqn_model import Model
 import pong_rl
 
 checkpoint = 14
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 save_folder = "dqn_models"
-model = Model.from_save("agent/state_hit_dqn/" + save_folder + "/" + str(checkpoint) + ".json")
+model = Model.from_save("agent/state_hit_dqn/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
 print("loaded model with parameters ({}, {}, {}, {}, {}, {}) from checkpoint {}".format(
     model.input_size,
     model.hidden_size,
@@ -15,10 +15,13 @@ import pong_rl
 
 load_model = False
 checkpoint = 0
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+seed = None # set for reproducible runs
 
+np.random.seed(seed)
 model = None
 if load_model:
-    model = Model.from_save("agent/state_label/batch_models/" + str(checkpoint) + ".json")
+    model = Model.from_save("agent/state_label/batch_models/" + str(checkpoint) + checkpoint_ext)
     print("loaded model with parameters ({}, {}, {}) from checkpoint {}".format(
         model.input_size,
         model.hidden_size,
@@ -40,7 +43,7 @@ else:
 
 # create Pong environment
 
-pong = pong_rl.PongEnv.without_render()
+pong = pong_rl.PongEnv.without_render(seed)
 episode_num = 0
 wins = 0
 losses = 0
@@ -55,11 +58,11 @@ while True:
     episode_probs = []
     episode_labels = []
     final_reward = 0
+    game_state = pong.get_normalized_state()
 
     while final_reward == 0:
         # predict action
 
-        game_state = pong.get_normalized_state()
         hidden_output, action_prob = model.forward(game_state)
         action = 1 if np.random.uniform() < action_prob[0] else 0
 
@@ -80,9 +83,7 @@ while True:
 
         # advance game by two frames to reduce horizon
         
-        final_reward = pong.tick(action)
-        if final_reward == 0:
-            final_reward = pong.tick(action)
+        final_reward, game_state = pong.step(action, 2)
     
     if final_reward == -1:
         losses += 1
@@ -122,4 +123,4 @@ while True:
         losses = 0
         checkpoint += 1
 
-        model.save("agent/state_label/batch_models/" + str(checkpoint) + ".json")
\ No newline at end of file
+        model.save("agent/state_label/batch_models/" + str(checkpoint) + ".ckpt")
\ No newline at end of file
@@ -11,8 +11,9 @@ import numpy as np
 import pong_rl
 
 checkpoint = 8
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 save_folder = "stochastic_models"
-model = Model.from_save("agent/state_label/" + save_folder + "/" + str(checkpoint) + ".json")
+model = Model.from_save("agent/state_label/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
 print("loaded model with parameters ({}, {}, {}, {}) from checkpoint {}".format(
     model.input_size,
     model.hidden_size,
@@ -26,14 +27,12 @@ pong.start()
 
 while True:
     reward = 0
+    game_state = pong.get_normalized_state()
 
     while reward == 0:
-        game_state = pong.get_normalized_state()
         h, action_prob = model.forward(game_state)
         action = 1 if np.random.uniform() < action_prob[0] else 0
 
-        reward = pong.tick(action)
-        if reward == 0:
-            reward = pong.tick(action)
+        reward, game_state = pong.step(action, 2)
     
     pong.reset()
\ No newline at end of file
@@ -8,6 +8,7 @@ sys.path.insert(0, str(Path(Path(__file__).parent.absolute()).parent.absolute())
 
 from models.array_vec import ArrayVec
 from models.policy_model import Model
+from models.returns import DiscountedReturns
 import numpy as np
 import pong_rl
 
@@ -16,13 +17,16 @@ import pong_rl
 save_folder = "reinforce_models"
 load_model = False
 checkpoint = 0
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
+seed = None # set for reproducible runs
 log_interval = 8000
 save_interval = 8000
 print("save folder: " + save_folder)
 
+np.random.seed(seed)
 model = None
 if load_model:
-    model = Model.from_save("agent/state_reinforce/" + save_folder + "/" + str(checkpoint) + ".json")
+    model = Model.from_save("agent/state_reinforce/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
     print("loaded model with parameters ({}, {}, {}, {}) from checkpoint {}".format(
         model.input_size,
         model.hidden_size,
@@ -47,7 +51,7 @@ else:
 
 # create Pong environment
 
-pong = pong_rl.PongEnv.without_render()
+pong = pong_rl.PongEnv.without_render(seed)
 episode_num = 0
 wins = 0
 losses = 0
@@ -63,7 +67,7 @@ extend_len = 20000
 sample_states = ArrayVec((model.input_size,), initial_len, extend_len)
 sample_hidden_outputs = ArrayVec((model.hidden_size,), initial_len, extend_len)
 sample_probs = ArrayVec((model.output_size,), initial_len, extend_len)
-sample_rewards = []
+sample_rewards = DiscountedReturns(model.discount_rate, initial_len, sample_size)
 
 hidden_batch = np.zeros((model.hidden_size, model.input_size + 1))
 output_batch = np.zeros((model.output_size, model.hidden_size + 1))
@@ -75,11 +79,11 @@ while True:
     episode_num += 1
     num_states = 0
     final_reward = 0
+    game_state = pong.get_normalized_state()
 
     while final_reward == 0:
         # predict action
 
-        game_state = pong.get_normalized_state()
         hidden_output, action_probs = model.forward(game_state)
         action = np.random.choice(action_probs.size, p=action_probs)
 
@@ -93,41 +97,37 @@ while True:
 
         # advance game state
 
-        final_reward = pong.tick(action)
-        if final_reward == 0:
-            final_reward = pong.tick(action)
+        final_reward, game_state = pong.step(action, 2)
 
-    # calculate discounted rewards
+    # store episode for discounted rewards
 
-    for s in range(num_states):
-        reward = final_reward * (model.discount_rate ** (num_states - s - 1))
-        sample_rewards.append(reward)
+    sample_rewards.push_episode(num_states, final_reward)
 
     if episode_num % sample_size == 0:
-        # normalize sample rewards
+        # calculate and normalize sample discounted rewards
 
-        sample_rewards = np.array(sample_rewards)
-        sample_rewards -= np.mean(sample_rewards)
-        sample_rewards /= np.std(sample_rewards)
+        sample_rewards.calc()
+        normalized_rewards = sample_rewards.normalize()
 
-        # calculate sample policy gradients
+        # calculate sample policy gradients with hidden outputs and
+        # probabilities transposed to the (size, batch) layout of batch_forward
 
         for s in range(0, sample_states.len(), sample_split):
-            hidden_grads, output_grads = model.batch_back_prop(
+            model.batch_sum_back_prop(
                 sample_states.get_view(s, s + sample_split),
-                sample_hidden_outputs.get_view(s, s + sample_split),
-                sample_probs.get_view(s, s + sample_split),
-                sample_rewards[s:s + sample_split],
+                np.transpose(sample_hidden_outputs.get_view(s, s + sample_split)),
+                np.transpose(sample_probs.get_view(s, s + sample_split)),
+                normalized_rewards[s:s + sample_split],
+                hidden_batch,
+                output_batch,
             )
-            hidden_batch += np.sum(hidden_grads, axis=0)
-            output_batch += np.sum(output_grads, axis=0)
 
         # reset sample data
 
         sample_states.clear()
         sample_hidden_outputs.clear()
         sample_probs.clear()
-        sample_rewards = []
+        sample_rewards.clear()
 
     if episode_num % batch_size == 0:
         # apply policy gradients
@@ -155,4 +155,4 @@ while True:
     
     if episode_num % save_interval == 0:
         checkpoint += 1
-        model.save("agent/state_reinforce/" + save_folder + "/" + str(checkpoint) + ".json")
\ No newline at end of file
+        model.save("agent/state_reinforce/" + save_folder + "/" + str(checkpoint) + ".ckpt")
\ No newline at end of file
@@ -11,8 +11,9 @@ import numpy as np
 import pong_rl
 
 checkpoint = 57
+checkpoint_ext = ".ckpt" # loads ".json" of older checkpoints when missing
 save_folder = "reinforce_models"
-model = Model.from_save("agent/state_reinforce/" + save_folder + "/" + str(checkpoint) + ".json")
+model = Model.from_save("agent/state_reinforce/" + save_folder + "/" + str(checkpoint) + checkpoint_ext)
 print("loaded model with parameters ({}, {}, {}, {}) from checkpoint {}".format(
     model.input_size,
     model.hidden_size,
@@ -26,15 +27,13 @@ pong.start()
 
 while True:
     reward = 0
+    game_state = pong.get_normalized_state()
     
     while reward == 0:
-        game_state = pong.get_normalized_state()
         h, action_probs = model.forward(game_state)
         action = np.random.choice(action_probs.size, p=action_probs)
         print(action_probs, action)
 
-        reward = pong.tick(action)
-        if reward == 0:
-            reward = pong.tick(action)
+        reward, game_state = pong.step(action, 2)
     
     pong.reset()
\ No newline at end of file
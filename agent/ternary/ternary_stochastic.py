@@ -25,6 +25,9 @@ hidden_size = 6
 output_size = 2
 learning_rate = 0.02
 epochs = 20000
+seed = None # set for reproducible runs
+random.seed(seed)
+np.random.seed(seed)
 model = Model.with_random_weights(input_size, hidden_size, output_size, learning_rate)
 
 log_interval = epochs // 10
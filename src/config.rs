@@ -21,4 +21,3 @@ pub const TOTAL_WIDTH: usize = WIDTH + BORDER * 2;
 pub const TOTAL_HEIGHT: usize = HEIGHT + BORDER * 2;
 
 pub const RESCALE: usize = 8;
-pub const EXPORT_LEN: usize = (WIDTH / RESCALE) * (HEIGHT / RESCALE);
@@ -1,15 +1,19 @@
 mod frame;
+mod layout;
 mod render;
 
+pub use layout::FrameLayout;
+
 use crate::config::{
-    BALL_SIZE, BALL_SPEED, EXPORT_LEN, HEIGHT, MAX_BOUNCE_ANGLE, MAX_INITIAL_ANGLE, PADDLE_HEIGHT,
+    BALL_SIZE, BALL_SPEED, HEIGHT, MAX_BOUNCE_ANGLE, MAX_INITIAL_ANGLE, PADDLE_HEIGHT,
     PADDLE_OFFSET, PADDLE_SPEED, PADDLE_WIDTH, WIDTH,
 };
 use frame::{FloatPoint, Frame, Point};
 use std::sync::{Arc, Mutex};
 
 use pixels::Pixels;
-use rand::Rng;
+use rand::rngs::StdRng;
+use rand::{Rng, SeedableRng};
 
 // Ball velocity
 
@@ -44,22 +48,34 @@ pub struct Pong {
     right_paddle: Point,
     frame: Frame,
     ended: bool,
+    rng: StdRng,
 }
 
 impl Pong {
-    // Create game with optional Pixels display
+    // Create game with optional Pixels display and optional random seed
 
-    pub fn new(pixels: Option<Arc<Mutex<Pixels>>>) -> Self {
+    pub fn new(pixels: Option<Arc<Mutex<Pixels>>>, seed: Option<u64>) -> Self {
+        let mut rng = match seed {
+            Some(seed) => StdRng::seed_from_u64(seed),
+            None => StdRng::from_entropy(),
+        };
         Pong {
             ball: Pong::initial_ball_pos(),
-            ball_velocity: Pong::random_initial_velocity(),
+            ball_velocity: Pong::random_initial_velocity(&mut rng),
             left_paddle: Pong::initial_left_paddle_pos(),
             right_paddle: Pong::initial_right_paddle_pos(),
             frame: Frame::uninit(pixels),
             ended: false,
+            rng,
         }
     }
 
+    // Reseed random number generator used for initial ball velocities
+
+    pub fn reseed(&mut self, seed: u64) {
+        self.rng = StdRng::seed_from_u64(seed);
+    }
+
     // Render initial frame with initial state
 
     pub fn start_game(&mut self) {
@@ -114,7 +130,7 @@ impl Pong {
     pub fn clear_game(&mut self) {
         self.frame.reset();
         self.ball = Pong::initial_ball_pos();
-        self.ball_velocity = Pong::random_initial_velocity();
+        self.ball_velocity = Pong::random_initial_velocity(&mut self.rng);
         self.left_paddle = Pong::initial_left_paddle_pos();
         self.right_paddle = Pong::initial_right_paddle_pos();
         self.ended = false;
@@ -133,12 +149,13 @@ impl Pong {
         ]
     }
 
-    // Export normalized frame data without borders
+    // Export normalized frame data without borders by setting each covered
+    // cell index within layout to its coverage value
 
-    pub fn export_frame(&self, scaled_frame: &mut [f64; EXPORT_LEN]) {
-        render::draw_scaled_ball(scaled_frame, self.ball);
-        render::draw_scaled_paddle(scaled_frame, self.left_paddle);
-        render::draw_scaled_paddle(scaled_frame, self.right_paddle);
+    pub fn export_frame(&self, layout: &FrameLayout, mut set_cell: impl FnMut(usize, f64)) {
+        render::draw_scaled_ball(&mut set_cell, self.ball, layout);
+        render::draw_scaled_paddle(&mut set_cell, self.left_paddle, layout);
+        render::draw_scaled_paddle(&mut set_cell, self.right_paddle, layout);
     }
 
     // Move ball with collision detection and return if game ended
@@ -298,8 +315,8 @@ impl Pong {
         )
     }
 
-    fn random_initial_velocity() -> Velocity {
-        let angle = rand::thread_rng().gen_range(-MAX_INITIAL_ANGLE..MAX_INITIAL_ANGLE);
+    fn random_initial_velocity(rng: &mut StdRng) -> Velocity {
+        let angle = rng.gen_range(-MAX_INITIAL_ANGLE..MAX_INITIAL_ANGLE);
         Velocity {
             x: BALL_SPEED * angle.to_radians().cos(),
             y: BALL_SPEED * angle.to_radians().sin(),
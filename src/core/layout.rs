@@ -0,0 +1,77 @@
+use crate::config::{HEIGHT, RESCALE, WIDTH};
+
+// Downscaled frame export resolution and region of interest
+
+#[derive(Clone, Copy)]
+pub struct FrameLayout {
+    pub rescale: usize,
+    start: (usize, usize),
+    cols: usize,
+    rows: usize,
+}
+
+impl FrameLayout {
+    // Create layout exporting cells of rescale by rescale pixels within crop
+    // rectangle (left, top, right, bottom) in game pixels, or within the whole
+    // game area without crop
+
+    pub fn new(rescale: usize, crop: Option<(usize, usize, usize, usize)>) -> Result<Self, String> {
+        if rescale == 0 || WIDTH % rescale != 0 || HEIGHT % rescale != 0 {
+            return Err(format!(
+                "rescale must divide game size {}x{}, got {}",
+                WIDTH, HEIGHT, rescale
+            ));
+        }
+        let (left, top, right, bottom) = crop.unwrap_or((0, 0, WIDTH, HEIGHT));
+        if left >= right || top >= bottom || right > WIDTH || bottom > HEIGHT {
+            return Err(format!(
+                "crop must be a nonempty rectangle within game size {}x{}",
+                WIDTH, HEIGHT
+            ));
+        }
+        if [left, top, right, bottom]
+            .iter()
+            .any(|edge| edge % rescale != 0)
+        {
+            return Err(format!(
+                "crop edges must be multiples of rescale {}",
+                rescale
+            ));
+        }
+
+        Ok(Self {
+            rescale,
+            start: (left / rescale, top / rescale),
+            cols: (right - left) / rescale,
+            rows: (bottom - top) / rescale,
+        })
+    }
+
+    // Number of exported cells
+
+    pub fn export_len(&self) -> usize {
+        self.rows * self.cols
+    }
+
+    // Rows and columns of exported cells
+
+    pub fn shape(&self) -> (usize, usize) {
+        (self.rows, self.cols)
+    }
+
+    // Find export index of downscaled cell column and row if within crop
+
+    pub fn cell_index(&self, x: usize, y: usize) -> Option<usize> {
+        let col = x.checked_sub(self.start.0).filter(|col| *col < self.cols)?;
+        let row = y.checked_sub(self.start.1).filter(|row| *row < self.rows)?;
+        Some(row * self.cols + col)
+    }
+}
+
+// Export whole game area at default rescale
+
+impl Default for FrameLayout {
+    fn default() -> Self {
+        Self::new(RESCALE, None).expect("default rescale should divide game size")
+    }
+}
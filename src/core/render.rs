@@ -1,7 +1,7 @@
 use super::frame::{FloatPoint, Point};
+use super::layout::FrameLayout;
 use crate::config::{
-    BALL_SIZE, BORDER, COLOR, EXPORT_LEN, HEIGHT, PADDLE_HEIGHT, PADDLE_WIDTH, RESCALE,
-    TOTAL_HEIGHT, TOTAL_WIDTH, WIDTH,
+    BALL_SIZE, BORDER, COLOR, HEIGHT, PADDLE_HEIGHT, PADDLE_WIDTH, TOTAL_HEIGHT, TOTAL_WIDTH, WIDTH,
 };
 
 // Draw ball on Pixels RGBA frame at position with subpixel rendering
@@ -58,82 +58,94 @@ pub fn draw_border(rgba_frame: &mut [u8]) {
     }
 }
 
-// Draw normalized average pixel values from ball on frame
+// Draw normalized average pixel values from ball with cell setter for cells in
+// layout
 
-pub fn draw_scaled_ball(scaled_frame: &mut [f64; EXPORT_LEN], pos: FloatPoint) {
+pub fn draw_scaled_ball(
+    set_cell: &mut impl FnMut(usize, f64),
+    pos: FloatPoint,
+    layout: &FrameLayout,
+) {
     // Calculate range of scaled pixels that overlap the ball
 
-    let x_range = (pos.0.floor() as usize / RESCALE, {
+    let rescale = layout.rescale;
+    let x_range = (pos.0.floor() as usize / rescale, {
         let max_x = (pos.0.ceil() as usize + BALL_SIZE).min(WIDTH);
-        max_x.div_ceil(RESCALE).saturating_sub(1)
+        max_x.div_ceil(rescale).saturating_sub(1)
     });
-    let y_range = (pos.1.floor() as usize / RESCALE, {
+    let y_range = (pos.1.floor() as usize / rescale, {
         let max_y = (pos.1.ceil() as usize + BALL_SIZE).min(HEIGHT);
-        max_y.div_ceil(RESCALE).saturating_sub(1)
+        max_y.div_ceil(rescale).saturating_sub(1)
     });
 
     for x in x_range.0..x_range.1 + 1 {
         for y in y_range.0..y_range.1 + 1 {
             // Calculate ball overlap area for each rescaled pixel
 
-            let frame_pos = ((x * RESCALE) as f64, (y * RESCALE) as f64);
-            let mut width = RESCALE as f64;
+            let frame_pos = ((x * rescale) as f64, (y * rescale) as f64);
+            let mut width = rescale as f64;
             if frame_pos.0 < pos.0 {
                 width -= pos.0 - frame_pos.0;
             }
-            if frame_pos.0 + RESCALE as f64 > pos.0 + BALL_SIZE as f64 {
-                width -= (frame_pos.0 + RESCALE as f64) - (pos.0 + BALL_SIZE as f64);
+            if frame_pos.0 + rescale as f64 > pos.0 + BALL_SIZE as f64 {
+                width -= (frame_pos.0 + rescale as f64) - (pos.0 + BALL_SIZE as f64);
             }
-            let mut height = RESCALE as f64;
+            let mut height = rescale as f64;
             if frame_pos.1 < pos.1 {
                 height -= pos.1 - frame_pos.1;
             }
-            if frame_pos.1 + RESCALE as f64 > pos.1 + BALL_SIZE as f64 {
-                height -= (frame_pos.1 + RESCALE as f64) - (pos.1 + BALL_SIZE as f64);
+            if frame_pos.1 + rescale as f64 > pos.1 + BALL_SIZE as f64 {
+                height -= (frame_pos.1 + rescale as f64) - (pos.1 + BALL_SIZE as f64);
             }
 
-            let proportion = (width * height) / (RESCALE * RESCALE) as f64;
-            scaled_frame[y * (WIDTH / RESCALE) + x] = proportion;
+            let proportion = (width * height) / (rescale * rescale) as f64;
+            if let Some(index) = layout.cell_index(x, y) {
+                set_cell(index, proportion);
+            }
         }
     }
 }
 
-// Draw normalized average pixel values from paddle on frame
+// Draw normalized average pixel values from paddle with cell setter for cells
+// in layout
 
-pub fn draw_scaled_paddle(scaled_frame: &mut [f64; EXPORT_LEN], pos: Point) {
+pub fn draw_scaled_paddle(set_cell: &mut impl FnMut(usize, f64), pos: Point, layout: &FrameLayout) {
     // Calculate range of scaled pixels that overlap the paddle
 
-    let x_range = (pos.0 / RESCALE, {
+    let rescale = layout.rescale;
+    let x_range = (pos.0 / rescale, {
         let max_x = pos.0 + PADDLE_WIDTH;
-        max_x.div_ceil(RESCALE).saturating_sub(1)
+        max_x.div_ceil(rescale).saturating_sub(1)
     });
-    let y_range = (pos.1 / RESCALE, {
+    let y_range = (pos.1 / rescale, {
         let max_y = pos.1 + PADDLE_HEIGHT;
-        max_y.div_ceil(RESCALE).saturating_sub(1)
+        max_y.div_ceil(rescale).saturating_sub(1)
     });
 
     for x in x_range.0..x_range.1 + 1 {
         for y in y_range.0..y_range.1 + 1 {
             // Calculate paddle overlap area for each rescaled pixel
 
-            let frame_pos = (x * RESCALE, y * RESCALE);
-            let mut width = RESCALE;
+            let frame_pos = (x * rescale, y * rescale);
+            let mut width = rescale;
             if frame_pos.0 < pos.0 {
                 width -= pos.0 - frame_pos.0;
             }
-            if frame_pos.0 + RESCALE > pos.0 + PADDLE_WIDTH {
-                width -= (frame_pos.0 + RESCALE) - (pos.0 + PADDLE_WIDTH);
+            if frame_pos.0 + rescale > pos.0 + PADDLE_WIDTH {
+                width -= (frame_pos.0 + rescale) - (pos.0 + PADDLE_WIDTH);
             }
-            let mut height = RESCALE;
+            let mut height = rescale;
             if frame_pos.1 < pos.1 {
                 height -= pos.1 - frame_pos.1;
             }
-            if frame_pos.1 + RESCALE > pos.1 + PADDLE_HEIGHT {
-                height -= (frame_pos.1 + RESCALE) - (pos.1 + PADDLE_HEIGHT);
+            if frame_pos.1 + rescale > pos.1 + PADDLE_HEIGHT {
+                height -= (frame_pos.1 + rescale) - (pos.1 + PADDLE_HEIGHT);
             }
 
-            let proportion = (width * height) as f64 / (RESCALE * RESCALE) as f64;
-            scaled_frame[y * (WIDTH / RESCALE) + x] = proportion;
+            let proportion = (width * height) as f64 / (rescale * rescale) as f64;
+            if let Some(index) = layout.cell_index(x, y) {
+                set_cell(index, proportion);
+            }
         }
     }
 }
@@ -1,17 +1,34 @@
-use crate::config::{BALL_SIZE, BALL_SPEED, EXPORT_LEN, HEIGHT, PADDLE_HEIGHT, WIDTH};
-use crate::core::{GameResult, PaddleMove, Pong};
+use crate::config::{BALL_SIZE, BALL_SPEED, HEIGHT, PADDLE_HEIGHT, WIDTH};
+use crate::core::{FrameLayout, GameResult, PaddleMove, Pong};
+use crate::export::{
+    frame_changes, sparse_frame, sparse_into_py, write_frame, write_values, ExportBuffer,
+    ExportType, ExportValue,
+};
+use crate::policy::{Activation, Policy};
 use crate::window;
 use crate::window::UserEvent;
 use std::sync::mpsc::Receiver;
 
-use numpy::PyArray1;
-use pyo3::{pyclass, pymethods, Python};
+use numpy::ndarray::{Array1, Array2, ArrayView1};
+use numpy::{IntoPyArray, PyArray1, PyReadonlyArray2};
+use pyo3::exceptions::PyValueError;
+use pyo3::{pyclass, pymethods, PyObject, PyResult, Python};
+use rand::rngs::StdRng;
+use rand::SeedableRng;
+
+// Offset separating policy sampling seeds from game seeds
+
+const POLICY_SEED_OFFSET: u64 = 0x9E37_79B9_7F4A_7C15;
 
 // Python-controlled Pong environment
 
 #[pyclass]
 pub struct PongEnv {
     pong: Pong,
+    export_type: ExportType,
+    layout: FrameLayout,
+    policy_rng: StdRng,
+    last_frame: Vec<(usize, f64)>,
     _event_channel: Option<Receiver<UserEvent>>,
 }
 
@@ -19,23 +36,35 @@ pub struct PongEnv {
 
 #[pymethods]
 impl PongEnv {
-    // Create new Pong environment with rendering
+    // Create new Pong environment with rendering, seeding initial ball
+    // velocities and exporting float32 arrays if requested
 
     #[staticmethod]
-    fn with_render() -> Self {
+    #[pyo3(signature = (seed = None, float32 = false))]
+    fn with_render(seed: Option<u64>, float32: bool) -> Self {
         let (pixels, event_channel, _) = window::create_window();
         Self {
-            pong: Pong::new(Some(pixels)),
+            pong: Pong::new(Some(pixels), seed),
+            export_type: ExportType::from_float32(float32),
+            layout: FrameLayout::default(),
+            policy_rng: policy_rng(seed),
+            last_frame: Vec::new(),
             _event_channel: Some(event_channel),
         }
     }
 
-    // Create new Pong environment without rendering
+    // Create new Pong environment without rendering, seeding initial ball
+    // velocities and exporting float32 arrays if requested
 
     #[staticmethod]
-    fn without_render() -> Self {
+    #[pyo3(signature = (seed = None, float32 = false))]
+    fn without_render(seed: Option<u64>, float32: bool) -> Self {
         Self {
-            pong: Pong::new(None),
+            pong: Pong::new(None, seed),
+            export_type: ExportType::from_float32(float32),
+            layout: FrameLayout::default(),
+            policy_rng: policy_rng(seed),
+            last_frame: Vec::new(),
             _event_channel: None,
         }
     }
@@ -46,46 +75,203 @@ impl PongEnv {
         self.pong.start_game();
     }
 
-    // Advance game with action and return reward
+    // Advance game with action and return reward, releasing the GIL while the
+    // game runs
 
-    fn tick(&mut self, action: i32) -> i32 {
-        let input = if action == 0 {
-            Some(PaddleMove::Down)
-        } else {
-            Some(PaddleMove::Up)
-        };
+    fn tick(&mut self, py: Python<'_>, action: i32) -> i32 {
+        py.allow_threads(|| reward(self.pong.tick(paddle_input(action.into()))))
+    }
 
-        let game_result = self.pong.tick(input);
-        match game_result {
-            Some(GameResult::Win) => 1,
-            Some(GameResult::Lose) => -1,
-            None => 0,
-        }
+    // Advance game with action for up to repeat ticks until the game ends and
+    // return reward with normalized game state, releasing the GIL while the
+    // game runs
+
+    #[pyo3(signature = (action, repeat = 1))]
+    fn step(&mut self, py: Python<'_>, action: i32, repeat: usize) -> (i32, PyObject) {
+        let game_reward = py.allow_threads(|| tick_repeat(&mut self.pong, action.into(), repeat));
+        (game_reward, self.get_normalized_state(py))
     }
 
-    // Normalize full internal game state
+    // Play game until it ends or max ticks pass with actions selected by a
+    // model with the given weights and output activation, and return the
+    // normalized states seen, actions taken, and final reward, releasing the
+    // GIL while the game runs
 
-    fn get_normalized_state<'py>(&self, py: Python<'py>) -> &'py PyArray1<f64> {
-        let state = self.pong.get_game_state();
-        PyArray1::from_slice(
-            py,
-            &[
-                ((state[0] + BALL_SIZE as f64 / 2.0) / WIDTH as f64 - 0.5) * 2.0, // Ball x position
-                ((state[1] + BALL_SIZE as f64 / 2.0) / HEIGHT as f64 - 0.5) * 2.0, // Ball y position
-                state[2] / BALL_SPEED, // Ball x velocity
-                state[3] / BALL_SPEED, // Ball y velocity
-                ((state[4] + PADDLE_HEIGHT as f64 / 2.0) / HEIGHT as f64 - 0.5) * 2.0, // Left paddle y position
-                ((state[5] + PADDLE_HEIGHT as f64 / 2.0) / HEIGHT as f64 - 0.5) * 2.0, // Right paddle y position
-            ],
+    #[pyo3(signature = (weights_hidden, weights_output, activation, max_ticks, repeat = 1))]
+    fn run_episode<'py>(
+        &mut self,
+        py: Python<'py>,
+        weights_hidden: PyReadonlyArray2<'py, f64>,
+        weights_output: PyReadonlyArray2<'py, f64>,
+        activation: &str,
+        max_ticks: usize,
+        repeat: usize,
+    ) -> PyResult<(PyObject, &'py PyArray1<i64>, i32)> {
+        let activation = Activation::from_name(activation)
+            .ok_or_else(|| PyValueError::new_err(format!("unknown activation: {}", activation)))?;
+        let policy = Policy::new(
+            weights_hidden.as_array(),
+            weights_output.as_array(),
+            activation,
+            6,
         )
+        .map_err(PyValueError::new_err)?;
+
+        let (states, actions, game_reward) = py.allow_threads(|| {
+            let mut states = Vec::new();
+            let mut actions = Vec::new();
+            let mut game_reward = 0;
+            let mut ticks = 0;
+
+            while game_reward == 0 && ticks < max_ticks {
+                // Select action from current state and advance game
+
+                let state = normalize_state(self.pong.get_game_state());
+                let action = policy.select_action(ArrayView1::from(&state), &mut self.policy_rng);
+                game_reward = tick_repeat(&mut self.pong, action, repeat);
+                ticks += repeat;
+
+                states.extend_from_slice(&state);
+                actions.push(action);
+            }
+            (states, actions, game_reward)
+        });
+
+        let states = Array2::from_shape_vec((actions.len(), 6), states)
+            .expect("states should have 6 values per action");
+        Ok((
+            self.export_type.into_pyobject(py, states),
+            actions.into_pyarray(py),
+            game_reward,
+        ))
+    }
+
+    // Normalize full internal game state
+
+    fn get_normalized_state(&self, py: Python<'_>) -> PyObject {
+        let state = normalize_state(self.pong.get_game_state());
+        self.export_type
+            .into_pyobject(py, Array1::from_vec(state.to_vec()))
+    }
+
+    // Set downscale factor and optional crop rectangle (left, top, right,
+    // bottom) in game pixels of exported frames, restarting frame change
+    // tracking from an empty frame
+
+    #[pyo3(signature = (rescale, crop = None))]
+    fn set_frame_layout(
+        &mut self,
+        rescale: usize,
+        crop: Option<(usize, usize, usize, usize)>,
+    ) -> PyResult<()> {
+        self.layout = FrameLayout::new(rescale, crop).map_err(PyValueError::new_err)?;
+        self.last_frame.clear();
+        Ok(())
+    }
+
+    // Number of cells in exported frames
+
+    #[getter]
+    fn frame_len(&self) -> usize {
+        self.layout.export_len()
+    }
+
+    // Rows and columns of cells in exported frames
+
+    #[getter]
+    fn frame_shape(&self) -> (usize, usize) {
+        self.layout.shape()
+    }
+
+    // Normalize and downsize frame without border, releasing the GIL while the
+    // frame is drawn
+
+    fn get_normalized_frame(&self, py: Python<'_>) -> PyObject {
+        let scaled_frame = py.allow_threads(|| {
+            let mut scaled_frame = Array1::zeros(self.layout.export_len());
+            self.pong
+                .export_frame(&self.layout, |index, value| scaled_frame[index] = value);
+            scaled_frame
+        });
+        self.export_type.into_pyobject(py, scaled_frame)
+    }
+
+    // Quantize normalized and downsized frame to uint8 coverage levels from 0
+    // to 255, releasing the GIL while the frame is drawn
+
+    fn get_quantized_frame<'py>(&self, py: Python<'py>) -> &'py PyArray1<u8> {
+        let quantized_frame = py.allow_threads(|| {
+            let mut quantized_frame = Array1::zeros(self.layout.export_len());
+            self.pong.export_frame(&self.layout, |index, value| {
+                quantized_frame[index] = u8::from_normalized(value)
+            });
+            quantized_frame
+        });
+        quantized_frame.into_pyarray(py)
+    }
+
+    // Export indices and values of nonzero cells in the normalized and
+    // downsized frame, releasing the GIL while the frame is drawn
+
+    fn get_sparse_frame<'py>(&self, py: Python<'py>) -> (&'py PyArray1<i64>, PyObject) {
+        let cells = py.allow_threads(|| sparse_frame(&self.pong, &self.layout));
+        sparse_into_py(py, self.export_type, &cells)
+    }
+
+    // Export indices and new values of normalized and downsized frame cells
+    // that changed since the last call, starting from an empty frame, so that
+    // assigning them keeps a dense frame array up to date
+
+    fn get_frame_changes<'py>(&mut self, py: Python<'py>) -> (&'py PyArray1<i64>, PyObject) {
+        let changes = py.allow_threads(|| {
+            let cells = sparse_frame(&self.pong, &self.layout);
+            let changes = frame_changes(&self.last_frame, &cells);
+            self.last_frame = cells;
+            changes
+        });
+        sparse_into_py(py, self.export_type, &changes)
+    }
+
+    // Write normalized game state into existing float64 or float32 array
+
+    fn write_normalized_state(&self, out: ExportBuffer<'_>) -> PyResult<()> {
+        let state = normalize_state(self.pong.get_game_state());
+        match out {
+            ExportBuffer::F64(mut out) => write_values(out.as_array_mut(), &state),
+            ExportBuffer::F32(mut out) => write_values(out.as_array_mut(), &state),
+            ExportBuffer::U8(_) => Err(PyValueError::new_err(
+                "game state cannot be quantized to uint8",
+            )),
+        }
     }
 
-    // Normalize and downsize frame without border
+    // Write normalized and downsized frame into existing float64 or float32
+    // array, or quantized frame into existing uint8 array, releasing the GIL
+    // while the frame is drawn
 
-    fn get_normalized_frame<'py>(&self, py: Python<'py>) -> &'py PyArray1<f64> {
-        let mut scaled_frame = [0.0; EXPORT_LEN];
-        self.pong.export_frame(&mut scaled_frame);
-        PyArray1::from_slice(py, &scaled_frame)
+    fn write_normalized_frame(&self, py: Python<'_>, out: ExportBuffer<'_>) -> PyResult<()> {
+        match out {
+            ExportBuffer::F64(mut out) => {
+                let out = out.as_array_mut();
+                py.allow_threads(|| write_frame(out, &self.pong, &self.layout))
+            }
+            ExportBuffer::F32(mut out) => {
+                let out = out.as_array_mut();
+                py.allow_threads(|| write_frame(out, &self.pong, &self.layout))
+            }
+            ExportBuffer::U8(mut out) => {
+                let out = out.as_array_mut();
+                py.allow_threads(|| write_frame(out, &self.pong, &self.layout))
+            }
+        }
+    }
+
+    // Reseed random number generators for initial ball velocities used from the
+    // next reset and for sampling policy actions
+
+    fn reseed(&mut self, seed: u64) {
+        self.pong.reseed(seed);
+        self.policy_rng = policy_rng(Some(seed));
     }
 
     // Reset game to initial state
@@ -94,3 +280,59 @@ impl PongEnv {
         self.pong.clear_game();
     }
 }
+
+// Create random number generator for sampling policy actions
+
+fn policy_rng(seed: Option<u64>) -> StdRng {
+    match seed {
+        Some(seed) => StdRng::seed_from_u64(seed.wrapping_add(POLICY_SEED_OFFSET)),
+        None => StdRng::from_entropy(),
+    }
+}
+
+// Convert Python action to paddle movement
+
+pub fn paddle_input(action: i64) -> Option<PaddleMove> {
+    if action == 0 {
+        Some(PaddleMove::Down)
+    } else {
+        Some(PaddleMove::Up)
+    }
+}
+
+// Advance game for up to repeat ticks and return reward once the game ends
+
+pub fn tick_repeat(pong: &mut Pong, action: i64, repeat: usize) -> i32 {
+    let input = paddle_input(action);
+    let mut game_reward = 0;
+    for _ in 0..repeat {
+        game_reward = reward(pong.tick(input));
+        if game_reward != 0 {
+            break;
+        }
+    }
+    game_reward
+}
+
+// Convert game result to reward
+
+pub fn reward(game_result: Option<GameResult>) -> i32 {
+    match game_result {
+        Some(GameResult::Win) => 1,
+        Some(GameResult::Lose) => -1,
+        None => 0,
+    }
+}
+
+// Normalize full internal game state to the range [-1, 1]
+
+pub fn normalize_state(state: [f64; 6]) -> [f64; 6] {
+    [
+        ((state[0] + BALL_SIZE as f64 / 2.0) / WIDTH as f64 - 0.5) * 2.0, // Ball x position
+        ((state[1] + BALL_SIZE as f64 / 2.0) / HEIGHT as f64 - 0.5) * 2.0, // Ball y position
+        state[2] / BALL_SPEED,                                            // Ball x velocity
+        state[3] / BALL_SPEED,                                            // Ball y velocity
+        ((state[4] + PADDLE_HEIGHT as f64 / 2.0) / HEIGHT as f64 - 0.5) * 2.0, // Left paddle y position
+        ((state[5] + PADDLE_HEIGHT as f64 / 2.0) / HEIGHT as f64 - 0.5) * 2.0, // Right paddle y position
+    ]
+}
@@ -0,0 +1,172 @@
+use crate::core::{FrameLayout, Pong};
+
+use numpy::ndarray::{Array, Array1, ArrayViewMut1, Dimension};
+use numpy::{Element, IntoPyArray, PyArray1, PyReadwriteArray1};
+use pyo3::exceptions::PyValueError;
+use pyo3::{FromPyObject, IntoPy, PyAny, PyObject, PyResult, Python};
+
+// Highest quantized frame value representing full coverage
+
+pub const QUANTIZE_LEVELS: f64 = 255.0;
+
+// Floating point type of arrays returned to Python
+
+#[derive(Clone, Copy)]
+pub enum ExportType {
+    F64,
+    F32,
+}
+
+impl ExportType {
+    // Select single or double precision export
+
+    pub fn from_float32(float32: bool) -> Self {
+        if float32 {
+            ExportType::F32
+        } else {
+            ExportType::F64
+        }
+    }
+
+    // Convert normalized values to a NumPy array of the export type
+
+    pub fn into_pyobject<D: Dimension>(self, py: Python<'_>, values: Array<f64, D>) -> PyObject {
+        let array: &PyAny = match self {
+            ExportType::F64 => values.into_pyarray(py),
+            ExportType::F32 => values.mapv(|value| value as f32).into_pyarray(py),
+        };
+        array.into_py(py)
+    }
+}
+
+// Numeric type normalized values can be written as
+
+pub trait ExportValue: Element + Copy {
+    fn from_normalized(value: f64) -> Self;
+}
+
+impl ExportValue for f64 {
+    fn from_normalized(value: f64) -> Self {
+        value
+    }
+}
+
+impl ExportValue for f32 {
+    fn from_normalized(value: f64) -> Self {
+        value as f32
+    }
+}
+
+// Quantize coverage values in the range [0, 1] to 0-255 with ties rounded to
+// even like NumPy, keeping error within half a level
+
+impl ExportValue for u8 {
+    fn from_normalized(value: f64) -> Self {
+        (value.clamp(0.0, 1.0) * QUANTIZE_LEVELS).round_ties_even() as u8
+    }
+}
+
+// Existing NumPy array of a supported type to write exported values into
+
+#[derive(FromPyObject)]
+pub enum ExportBuffer<'py> {
+    F64(PyReadwriteArray1<'py, f64>),
+    F32(PyReadwriteArray1<'py, f32>),
+    U8(PyReadwriteArray1<'py, u8>),
+}
+
+// Write normalized values into existing array
+
+pub fn write_values<T: ExportValue>(mut out: ArrayViewMut1<'_, T>, values: &[f64]) -> PyResult<()> {
+    check_export_len(out.len(), values.len())?;
+    for (slot, value) in out.iter_mut().zip(values) {
+        *slot = T::from_normalized(*value);
+    }
+    Ok(())
+}
+
+// Write normalized and downsized frame with layout into existing array
+
+pub fn write_frame<T: ExportValue>(
+    mut out: ArrayViewMut1<'_, T>,
+    pong: &Pong,
+    layout: &FrameLayout,
+) -> PyResult<()> {
+    check_export_len(out.len(), layout.export_len())?;
+    out.fill(T::from_normalized(0.0));
+    pong.export_frame(layout, |index, value| {
+        out[index] = T::from_normalized(value)
+    });
+    Ok(())
+}
+
+// Collect normalized and downsized frame cells in layout with nonzero values
+// sorted by index, keeping the last value drawn for overlapping cells like the dense
+// export
+
+pub fn sparse_frame(pong: &Pong, layout: &FrameLayout) -> Vec<(usize, f64)> {
+    let mut cells = Vec::new();
+    pong.export_frame(layout, |index, value| cells.push((index, value)));
+    cells.sort_by_key(|cell| cell.0);
+    cells.dedup_by(|next, kept| {
+        if next.0 == kept.0 {
+            kept.1 = next.1;
+            true
+        } else {
+            false
+        }
+    });
+    cells.retain(|cell| cell.1 != 0.0);
+    cells
+}
+
+// Merge sorted sparse frames and collect cells with changed values, setting
+// cells missing from the current frame to zero
+
+pub fn frame_changes(previous: &[(usize, f64)], current: &[(usize, f64)]) -> Vec<(usize, f64)> {
+    let mut changes = Vec::new();
+    let (mut p, mut c) = (0, 0);
+    while p < previous.len() || c < current.len() {
+        if c == current.len() || (p < previous.len() && previous[p].0 < current[c].0) {
+            changes.push((previous[p].0, 0.0));
+            p += 1;
+        } else if p == previous.len() || current[c].0 < previous[p].0 {
+            changes.push(current[c]);
+            c += 1;
+        } else {
+            if previous[p].1 != current[c].1 {
+                changes.push(current[c]);
+            }
+            p += 1;
+            c += 1;
+        }
+    }
+    changes
+}
+
+// Convert sparse cells to NumPy index array and value array of the export type
+
+pub fn sparse_into_py<'py>(
+    py: Python<'py>,
+    export_type: ExportType,
+    cells: &[(usize, f64)],
+) -> (&'py PyArray1<i64>, PyObject) {
+    let indices = Array1::from_iter(cells.iter().map(|cell| cell.0 as i64));
+    let values = Array1::from_iter(cells.iter().map(|cell| cell.1));
+    (
+        indices.into_pyarray(py),
+        export_type.into_pyobject(py, values),
+    )
+}
+
+// Check that output array length matches export length
+
+fn check_export_len(len: usize, expected: usize) -> PyResult<()> {
+    if len != expected {
+        return Err(PyValueError::new_err(format!(
+            "expected array of length {}, got {}",
+            expected, len
+        )));
+    }
+    Ok(())
+}
@@ -35,7 +35,7 @@ impl PongGame {
     pub fn new() -> Self {
         let (pixels, event_channel, window_handle) = window::create_window();
         Self {
-            pong: Pong::new(Some(pixels)),
+            pong: Pong::new(Some(pixels), None),
             selected_move: None,
             active_moves: ActiveMoves {
                 up: false,
@@ -3,20 +3,25 @@
 mod config;
 mod core;
 mod env;
+mod export;
 mod game;
+mod policy;
+mod vec_env;
 mod window;
 
 pub use config::FRAME_DELAY;
 pub use game::{PongGame, TickResult};
 
 use env::PongEnv;
+use vec_env::PongVecEnv;
 
 use pyo3::prelude::*;
 
-// Export Pong game environment to Python
+// Export Pong game environments to Python
 
 #[pymodule]
 fn pong_rl(_: Python<'_>, module: &PyModule) -> PyResult<()> {
     module.add_class::<PongEnv>()?;
+    module.add_class::<PongVecEnv>()?;
     Ok(())
 }
@@ -0,0 +1,112 @@
+use numpy::ndarray::{s, Array1, ArrayView1, ArrayView2};
+use rand::Rng;
+
+// Output layer activation selecting how actions are chosen
+
+#[derive(Clone, Copy)]
+pub enum Activation {
+    Sigmoid,
+    Softmax,
+    Linear,
+}
+
+impl Activation {
+    // Parse activation name
+
+    pub fn from_name(name: &str) -> Option<Self> {
+        match name {
+            "sigmoid" => Some(Activation::Sigmoid),
+            "softmax" => Some(Activation::Softmax),
+            "linear" => Some(Activation::Linear),
+            _ => None,
+        }
+    }
+}
+
+// Model with 1 hidden layer using relu and 1 output layer with weight matrices
+// storing biases in the last column
+
+pub struct Policy<'a> {
+    hidden_weights: ArrayView2<'a, f64>,
+    output_weights: ArrayView2<'a, f64>,
+    activation: Activation,
+}
+
+impl<'a> Policy<'a> {
+    // Create policy after checking weight shapes
+
+    pub fn new(
+        hidden_weights: ArrayView2<'a, f64>,
+        output_weights: ArrayView2<'a, f64>,
+        activation: Activation,
+        input_size: usize,
+    ) -> Result<Self, String> {
+        if hidden_weights.ncols() != input_size + 1 {
+            return Err(format!(
+                "expected hidden weights with {} columns, got {}",
+                input_size + 1,
+                hidden_weights.ncols()
+            ));
+        }
+        if output_weights.nrows() == 0 || output_weights.ncols() != hidden_weights.nrows() + 1 {
+            return Err(format!(
+                "expected output weights with {} columns, got shape {:?}",
+                hidden_weights.nrows() + 1,
+                output_weights.shape()
+            ));
+        }
+        Ok(Self {
+            hidden_weights,
+            output_weights,
+            activation,
+        })
+    }
+
+    // Calculate forward propagation result without output activation
+
+    fn forward(&self, input: ArrayView1<'_, f64>) -> Array1<f64> {
+        let hidden_biases = self.hidden_weights.column(self.hidden_weights.ncols() - 1);
+        let mut hidden_output = self.hidden_weights.slice(s![.., ..-1]).dot(&input) + hidden_biases;
+        hidden_output.mapv_inplace(|value| value.max(0.0)); // Relu activation
+        let output_biases = self.output_weights.column(self.output_weights.ncols() - 1);
+        self.output_weights.slice(s![.., ..-1]).dot(&hidden_output) + output_biases
+    }
+
+    // Select action by sampling sigmoid or softmax outputs or taking the
+    // highest linear output
+
+    pub fn select_action(&self, input: ArrayView1<'_, f64>, rng: &mut impl Rng) -> i64 {
+        let output = self.forward(input);
+        match self.activation {
+            Activation::Sigmoid => {
+                let prob = 1.0 / (1.0 + (-output[0]).exp());
+                if rng.gen::<f64>() < prob {
+                    1
+                } else {
+                    0
+                }
+            }
+            Activation::Softmax => {
+                let max = output.fold(f64::NEG_INFINITY, |max, &value| max.max(value));
+                let exps = output.mapv(|value| (value - max).exp());
+                let mut sample = rng.gen::<f64>() * exps.sum();
+                for (action, &value) in exps.iter().enumerate() {
+                    if sample < value {
+                        return action as i64;
+                    }
+                    sample -= value;
+                }
+                exps.len() as i64 - 1
+            }
+            Activation::Linear => {
+                let mut best = 0;
+                for (action, &value) in output.iter().enumerate() {
+                    if value > output[best] {
+                        best = action;
+                    }
+                }
+                best as i64
+            }
+        }
+    }
+}
@@ -0,0 +1,123 @@
+use crate::core::Pong;
+use crate::env::{normalize_state, tick_repeat};
+use crate::export::ExportType;
+
+use numpy::ndarray::{Array1, Array2, ArrayView1};
+use numpy::{IntoPyArray, PyArray1, PyReadonlyArray1};
+use pyo3::exceptions::PyValueError;
+use pyo3::{pyclass, pymethods, PyObject, PyResult, Python};
+
+// Python-controlled batch of Pong environments stepped together
+
+#[pyclass]
+pub struct PongVecEnv {
+    games: Vec<Pong>,
+    export_type: ExportType,
+}
+
+// Methods exposed to Python
+
+#[pymethods]
+impl PongVecEnv {
+    // Create batch of Pong environments without rendering, seeding each game
+    // with consecutive seeds and exporting float32 arrays if requested
+
+    #[staticmethod]
+    #[pyo3(signature = (num_envs, seed = None, float32 = false))]
+    fn without_render(num_envs: usize, seed: Option<u64>, float32: bool) -> Self {
+        Self {
+            games: (0..num_envs)
+                .map(|e| Pong::new(None, seed.map(|seed| seed.wrapping_add(e as u64))))
+                .collect(),
+            export_type: ExportType::from_float32(float32),
+        }
+    }
+
+    // Get number of environments in batch
+
+    fn num_envs(&self) -> usize {
+        self.games.len()
+    }
+
+    // Start all games with initial state
+
+    fn start(&mut self) {
+        for pong in &mut self.games {
+            pong.start_game();
+        }
+    }
+
+    // Advance each game with its action for up to repeat ticks and return
+    // stacked states, rewards, and done flags with finished games reset,
+    // releasing the GIL while the games run
+
+    #[pyo3(signature = (actions, repeat = 1))]
+    fn step<'py>(
+        &mut self,
+        py: Python<'py>,
+        actions: PyReadonlyArray1<'py, i64>,
+        repeat: usize,
+    ) -> PyResult<(PyObject, &'py PyArray1<i32>, &'py PyArray1<bool>)> {
+        let actions = actions.as_array();
+        if actions.len() != self.games.len() {
+            return Err(PyValueError::new_err(format!(
+                "expected {} actions, got {}",
+                self.games.len(),
+                actions.len()
+            )));
+        }
+
+        let mut states = Array2::zeros((self.games.len(), 6));
+        let mut rewards = Array1::zeros(self.games.len());
+        let mut dones = Array1::from_elem(self.games.len(), false);
+
+        py.allow_threads(|| {
+            for (e, pong) in self.games.iter_mut().enumerate() {
+                // Advance game and reset finished game
+
+                let game_reward = tick_repeat(pong, actions[e], repeat);
+                if game_reward != 0 {
+                    pong.clear_game();
+                    pong.start_game();
+                    dones[e] = true;
+                }
+                rewards[e] = game_reward;
+                let state = normalize_state(pong.get_game_state());
+                states.row_mut(e).assign(&ArrayView1::from(&state));
+            }
+        });
+
+        Ok((
+            self.export_type.into_pyobject(py, states),
+            rewards.into_pyarray(py),
+            dones.into_pyarray(py),
+        ))
+    }
+
+    // Normalize full internal game states stacked by environment
+
+    fn get_normalized_states(&self, py: Python<'_>) -> PyObject {
+        let mut states = Array2::zeros((self.games.len(), 6));
+        for (e, pong) in self.games.iter().enumerate() {
+            let state = normalize_state(pong.get_game_state());
+            states.row_mut(e).assign(&ArrayView1::from(&state));
+        }
+        self.export_type.into_pyobject(py, states)
+    }
+
+    // Reseed each game with consecutive seeds used from the next reset
+
+    fn reseed(&mut self, seed: u64) {
+        for (e, pong) in self.games.iter_mut().enumerate() {
+            pong.reseed(seed.wrapping_add(e as u64));
+        }
+    }
+
+    // Reset all games to initial state
+
+    fn reset(&mut self) {
+        for pong in &mut self.games {
+            pong.clear_game();
+        }
+    }
+}